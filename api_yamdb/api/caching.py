@@ -0,0 +1,222 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from api_yamdb.metrics import response_cache_total
+from api_yamdb.shared_cache import get_shared_cache
+
+
+# Пространство имён, версия которого входит во все условные ответы;
+# увеличивается массовыми операциями, минующими сигналы моделей.
+BULK_NAMESPACE = 'bulk'
+
+
+def _version_key(namespace):
+    return f'version:{namespace}'
+
+
+def _modified_key(namespace):
+    return f'modified:{namespace}'
+
+
+def get_version(namespace):
+    """Текущая версия данных пространства имён.
+
+    Версии хранятся в общем кеше, чтобы изменение, сделанное одним
+    процессом или командой manage.py, сбрасывало ответы во всех.
+    Начальное значение берётся из времени, чтобы после вытеснения счётчика
+    из кеша не совпасть с версией уже закешированных ответов.
+    """
+    return get_shared_cache().get_or_set(
+        _version_key(namespace), int(time.time() * 1000), None
+    )
+
+
+def bump_version(namespace):
+    """Инвалидирует все закешированные ответы пространства имён."""
+    shared = get_shared_cache()
+    shared.set(_modified_key(namespace), time.time(), None)
+    try:
+        version = shared.incr(_version_key(namespace))
+    except ValueError:
+        return get_version(namespace)
+    # incr() некоторых бэкендов (DatabaseCache) сбрасывает срок хранения
+    # на срок по умолчанию.
+    shared.touch(_version_key(namespace), None)
+    return version
+
+
+def bump_version_on_commit(*namespaces):
+    """Увеличивает версии после фиксации текущей транзакции.
+
+    Если увеличить версию раньше, параллельный запрос может прочитать
+    ещё не изменённые данные и закешировать их под новой версией.
+    """
+    def bump():
+        for namespace in dict.fromkeys(namespaces):
+            bump_version(namespace)
+    transaction.on_commit(bump)
+
+
+def get_validators(namespaces):
+    """Версии пространств имён и время последнего изменения любого из
+    них, за два обращения к кешу в обычном случае.
+
+    Если время изменения неизвестно (счётчик вытеснен или ещё не
+    создавался), им считается текущий момент: Last-Modified может
+    оказаться позже настоящего, но не раньше.
+    """
+    shared = get_shared_cache()
+    keys = [_version_key(namespace) for namespace in namespaces]
+    keys += [_modified_key(namespace) for namespace in namespaces]
+    values = shared.get_many(keys)
+    versions = tuple(
+        values.get(_version_key(namespace)) or get_version(namespace)
+        for namespace in namespaces
+    )
+    now = time.time()
+    modified = []
+    for namespace in namespaces:
+        value = values.get(_modified_key(namespace))
+        if value is None:
+            shared.add(_modified_key(namespace), now, None)
+            value = shared.get(_modified_key(namespace), now)
+        modified.append(value)
+    return versions, max(modified)
+
+
+def etag_matches(request, etag, exists=True):
+    """Совпадает ли If-None-Match с etag.
+
+    `*` совпадает с любым текущим представлением, то есть только с
+    существующим ресурсом; пока это неизвестно, передаётся exists=False.
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return etag in etags or (exists and '*' in etags)
+
+
+def not_modified_since(request, last_modified):
+    if_modified_since = parse_http_date_safe(
+        request.headers.get('If-Modified-Since', '')
+    )
+    return (
+        if_modified_since is not None
+        and int(last_modified) <= if_modified_since
+    )
+
+
+class ConditionalListMixin:
+    """Отвечает 304 на условные GET-запросы list().
+
+    ETag строится из пути, строки запроса и версий пространств имён из
+    get_version_namespaces(), Last-Modified - из времени их последнего
+    изменения. Версии читаются до обработки запроса, поэтому актуальный
+    клиент получает 304 без запросов к БД и без сериализации.
+    """
+
+    def get_version_namespaces(self):
+        raise NotImplementedError(
+            '.get_version_namespaces() must be overridden'
+        )
+
+    def conditional(self, handler, request, *args, **kwargs):
+        versions, last_modified = get_validators(
+            (*self.get_version_namespaces(), BULK_NAMESPACE)
+        )
+        digest = hashlib.md5(
+            f'{request.get_full_path()}:{versions}'.encode()
+        ).hexdigest()
+        headers = {'ETag': f'"{digest}"'}
+        # Last-Modified точен до секунды: пока секунда изменения не
+        # прошла, новое изменение получило бы ту же дату, поэтому
+        # заголовок не отдаётся.
+        if time.time() >= int(last_modified) + 1:
+            headers['Last-Modified'] = http_date(last_modified)
+        if request.headers.get('If-None-Match'):
+            not_modified = etag_matches(
+                request, headers['ETag'], exists=False
+            )
+        else:
+            not_modified = (
+                'Last-Modified' in headers
+                and not_modified_since(request, last_modified)
+            )
+        if not_modified:
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+        response = handler(request, *args, **kwargs)
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        if etag_matches(request, headers['ETag']):
+            # If-None-Match: * - ресурс существует.
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """Отвечает 304 на условные GET-запросы list() и retrieve()."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class CachedListMixin:
+    """Кеширует ответ list() по хосту, строке запроса и версии данных.
+
+    Версия пространства имён `cache_namespace` увеличивается при любом
+    изменении данных, а версия BULK_NAMESPACE - при массовой загрузке,
+    поэтому устаревшие ответы не используются. Клиент, приславший
+    актуальный If-None-Match, получает 304.
+    """
+
+    cache_namespace = None
+
+    def get_cache_key(self, request, versions):
+        query = '&'.join(
+            f'{key}={value}'
+            for key, values in sorted(request.query_params.lists())
+            for value in values
+        )
+        digest = hashlib.md5(
+            f'{request.get_host()}?{query}'.encode()
+        ).hexdigest()
+        version = '-'.join(str(version) for version in versions)
+        return f'response:{self.cache_namespace}:{version}:{digest}'
+
+    def list(self, request, *args, **kwargs):
+        versions, _ = get_validators((self.cache_namespace, BULK_NAMESPACE))
+        key = self.get_cache_key(request, versions)
+        etag = f'"{key.split(":", 1)[1]}"'
+        if etag_matches(request, etag):
+            response_cache_total.inc(
+                namespace=self.cache_namespace, result='not_modified'
+            )
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag}
+            )
+        data = cache.get(key)
+        response_cache_total.inc(
+            namespace=self.cache_namespace,
+            result='miss' if data is None else 'hit'
+        )
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+        return Response(data, headers={'ETag': etag})
@@ -1,4 +1,5 @@
 from django_filters.rest_framework import CharFilter, FilterSet
+from rest_framework.filters import OrderingFilter
 
 from reviews.models import Title
 
@@ -11,3 +12,20 @@ class TitleFilter(FilterSet):
     class Meta:
         model = Title
         fields = ('name', 'category', 'genre', 'year',)
+
+
+class StableOrderingFilter(OrderingFilter):
+    """Дополняет сортировку первичным ключом.
+
+    При равных значениях порядок строк не определён, и страницы могут
+    пересекаться. id добавляется в направлении последнего поля, чтобы
+    сортировку целиком обслуживал индекс (поле, id).
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering or any(
+            field.lstrip('-') in ('id', 'pk') for field in ordering
+        ):
+            return ordering
+        return (*ordering, '-id' if ordering[-1].startswith('-') else 'id')
@@ -0,0 +1,132 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from api_yamdb.metrics import observe_request
+
+logger = logging.getLogger('api.requests')
+
+
+class RequestMetrics:
+    """Число и время SQL-запросов, время сериализации ответа, обработки
+    во вьюхе и всего запроса.
+
+    Экземпляр подключается ко всем соединениям через execute_wrapper,
+    поэтому учитываются запросы любого кода, выполненного в запросе.
+    Временем сериализации считается рендеринг ответа DRF в JSON.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.view_time = 0.0
+        self.total_time = 0.0
+        self.sql = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += duration
+            self.sql.append((sql, duration))
+
+    def finish(self):
+        finished = time.perf_counter()
+        self.total_time = finished - self.started
+        if self.view_started is not None:
+            self.view_time = finished - self.view_started
+
+    def server_timing(self):
+        return ', '.join((
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+            f'serializer;dur={self.serializer_time * 1000:.2f}',
+            f'view;dur={self.view_time * 1000:.2f}',
+            f'total;dur={self.total_time * 1000:.2f}',
+        ))
+
+    def as_record(self, request, response):
+        match = request.resolver_match
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'route': match.view_name if match else None,
+            'status': response.status_code,
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 3),
+            'serializer_ms': round(self.serializer_time * 1000, 3),
+            'view_ms': round(self.view_time * 1000, 3),
+            'total_ms': round(self.total_time * 1000, 3),
+        }
+        threshold = settings.REQUEST_METRICS_SQL_THRESHOLD_MS
+        if self.total_time * 1000 >= threshold:
+            record['sql'] = [
+                {'sql': sql, 'ms': round(duration * 1000, 3)}
+                for sql, duration in self.sql
+            ]
+        return record
+
+
+class RequestMetricsMiddleware:
+    """Собирает RequestMetrics для доли запросов REQUEST_METRICS_SAMPLE_RATE.
+
+    Число и длительность учитываются в реестре метрик для всех запросов.
+    Результат пишется одной JSON-строкой в лог api.requests; если запрос
+    длился дольше REQUEST_METRICS_SQL_THRESHOLD_MS, в лог попадает и весь
+    его SQL. Заголовок Server-Timing с числом и временем SQL-запросов
+    отдаётся клиенту только при DEBUG.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.REQUEST_METRICS_SAMPLE_RATE:
+            started = time.perf_counter()
+            response = self.get_response(request)
+            observe_request(
+                request, response, time.perf_counter() - started
+            )
+            return response
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        metrics.finish()
+        observe_request(request, response, metrics.total_time, metrics)
+        if settings.DEBUG:
+            response['Server-Timing'] = metrics.server_timing()
+        logger.info(json.dumps(
+            metrics.as_record(request, response), ensure_ascii=False
+        ))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, 'metrics', None)
+        if metrics is not None:
+            metrics.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Ответы DRF рендерятся после возврата из вьюхи, и рендеринг любым
+        # рендерером учитывается здесь как время сериализации.
+        metrics = getattr(request, 'metrics', None)
+        if metrics is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                metrics.serializer_time += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
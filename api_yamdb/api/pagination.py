@@ -0,0 +1,46 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class PubDateCursorPagination(CursorPagination):
+    """Курсорная пагинация по (pub_date, id) без OFFSET и COUNT(*)."""
+
+    ordering = ('pub_date', 'id')
+
+    def get_ordering(self, request, queryset, view):
+        # Порядок фиксирован: только он обслуживается индексом.
+        return self.ordering
+
+
+class LeaderboardCursorPagination(CursorPagination):
+    """Курсорная пагинация рейтинга: по убыванию взвешенной оценки, при
+    равенстве - по id произведения."""
+
+    ordering = ('-score', 'title_id')
+
+
+class OptInCursorPagination(PageNumberPagination):
+    """Постраничная пагинация, переключаемая на курсорную.
+
+    Клиент включает курсорный режим параметром `?pagination=cursor`,
+    после чего переходит по ссылкам `next`/`previous`. Стоимость
+    глубоких страниц в этом режиме не растёт.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_pagination_class = PubDateCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        cursor_paginator = self.cursor_pagination_class()
+        if (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or cursor_paginator.cursor_query_param in request.query_params
+        ):
+            self.cursor_paginator = cursor_paginator
+            return cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -26,7 +26,7 @@ class IsAuthorOrAdminOrModeratorOrReadOnly(
     def has_object_permission(self, request, view, obj):
         return (
             request.method in permissions.SAFE_METHODS
-            or obj.author == request.user
+            or obj.author_id == request.user.pk
             or request.user.is_moderator
             or request.user.is_admin
         )
@@ -1,20 +1,46 @@
 import datetime as dt
+import math
 
-from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 from rest_framework.relations import SlugRelatedField
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 
 from api_yamdb.constants import (
     CHECK_USERNAME, COD_MAX_LENGTH, EMAIL_MAX_LENGTH,
     MAX_SCOPE_VALUE, MIN_VALUE,
     NO_USERNAMES, USERNAME_MAX_LENGTH
 )
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from reviews.search import SEARCH_KINDS
 from users.models import ProjectUser
+from users.outbox import enqueue_mail
+from users.tokens import VERSION_CLAIM, UserRefreshToken
+
+
+def finite(value):
+    """Проверяет, что число можно записать в JSON.
+
+    FastJSONRenderer кодирует NaN и бесконечность как null, а не
+    отклоняет их, как JSONRenderer, поэтому дробные значения проверяются
+    при сериализации.
+    """
+    if not math.isfinite(value):
+        raise ValueError(f'Значение {value} нельзя записать в JSON.')
+    return value
+
+
+class FiniteFloatField(serializers.FloatField):
+    """FloatField, отклоняющий NaN и бесконечность."""
+
+    def to_representation(self, value):
+        return finite(super().to_representation(value))
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -52,16 +78,24 @@ class UserCreateSerializer(serializers.Serializer):
         return value
 
     def validate(self, data):
+        """Одним запросом находит пользователя с такой парой username и
+        email или пользователя, с которым она конфликтует."""
         username = data.get('username')
         email = data.get('email')
-        if ProjectUser.objects.filter(username=username, email=email).exists():
-            return data
-        if ProjectUser.objects.filter(username=username).exists():
+        self.existing_user = None
+        users = list(ProjectUser.objects.filter(
+            Q(username=username) | Q(email=email)
+        )[:2])
+        for user in users:
+            if user.username == username and user.email == email:
+                self.existing_user = user
+                return data
+        if any(user.username == username for user in users):
             raise serializers.ValidationError(
                 f'Пользователь со значением username = {username}'
                 'уже существует'
             )
-        if ProjectUser.objects.filter(email=email).exists():
+        if users:
             raise serializers.ValidationError(
                 f'Пользователь со значением email = {email}'
                 'уже существует'
@@ -69,19 +103,24 @@ class UserCreateSerializer(serializers.Serializer):
         return data
 
     def create(self, validated_data):
-        username = validated_data.get('username')
-        email = validated_data.get('email')
-        user, _ = ProjectUser.objects.get_or_create(
-            username=username,
-            email=email
-        )
+        user = self.existing_user
+        if user is None:
+            try:
+                with transaction.atomic():
+                    user = ProjectUser.objects.create(**validated_data)
+            except IntegrityError:
+                # Параллельный запрос успел создать пользователя.
+                user = ProjectUser.objects.filter(**validated_data).first()
+                if user is None:
+                    raise serializers.ValidationError(
+                        'Пользователь с таким username или email '
+                        'уже существует'
+                    )
         confirmation_code = default_token_generator.make_token(user)
-        send_mail(
+        enqueue_mail(
             subject='Код подтверждения',
-            message=f'Код подтверждения: {confirmation_code}',
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=(email,),
-            fail_silently=True,
+            body=f'Код подтверждения: {confirmation_code}',
+            recipient=user.email,
         )
         return user
 
@@ -104,8 +143,40 @@ class UserTokenSerializer(serializers.Serializer):
         user = get_object_or_404(ProjectUser, username=username)
         if not default_token_generator.check_token(user, confirmation_code):
             raise serializers.ValidationError('Неверный код подтверждения')
+        if not user.is_active:
+            raise serializers.ValidationError('Пользователь заблокирован')
+        data['user'] = user
         return super().validate(data)
 
+    def to_representation(self, instance):
+        refresh = UserRefreshToken.for_user(instance['user'])
+        return {'token': str(refresh.access_token), 'refresh': str(refresh)}
+
+
+class TokenRefreshSerializer(serializers.Serializer):
+    """Сериализатор для обновления токенов."""
+
+    refresh = serializers.CharField()
+
+    def validate(self, data):
+        try:
+            refresh = UserRefreshToken(data['refresh'])
+        except TokenError as error:
+            raise InvalidToken(error.args[0])
+        user = ProjectUser.objects.filter(
+            pk=refresh[jwt_settings.USER_ID_CLAIM], is_active=True
+        ).only('token_version').first()
+        if user is None or refresh.get(VERSION_CLAIM) != user.token_version:
+            raise InvalidToken('Токен отозван')
+        if not refresh.rotate():
+            raise InvalidToken('Токен уже использован')
+        data['refresh'] = refresh
+        return data
+
+    def to_representation(self, instance):
+        refresh = instance['refresh']
+        return {'token': str(refresh.access_token), 'refresh': str(refresh)}
+
 
 class ReviewSerializer(serializers.ModelSerializer):
     """Сериализатор модели Review."""
@@ -131,9 +202,8 @@ class ReviewSerializer(serializers.ModelSerializer):
         request = self.context['request']
         if request.method != 'POST':
             return data
-        author = request.user
         title_id = self.context['view'].kwargs['title_id']
-        if Review.objects.filter(author=author,
+        if Review.objects.filter(author_id=request.user.pk,
                                  title_id=title_id).exists():
             raise serializers.ValidationError(
                 'Вы уже оставляли рецензию'
@@ -167,9 +237,65 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug')
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """Отдаёт только поля из параметра ?fields= и раскрывает вложенными
+    объектами только связи из ?expand=, остальные связи заменяет slug.
+
+    Без ?fields= отдаются все поля, без ?expand= раскрываются все связи.
+    """
+
+    # Имя связи -> поле, которым она представляется без раскрытия.
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+        fields, expanded = self.get_fieldset(request.query_params)
+        for name in set(self.fields) - set(fields):
+            self.fields.pop(name)
+        for name, slug_field in self.expandable_fields.items():
+            if name in self.fields and name not in expanded:
+                self.fields[name] = serializers.SlugRelatedField(
+                    slug_field=slug_field, read_only=True,
+                    many=getattr(self.fields[name], 'many', False)
+                )
+
+    @staticmethod
+    def parse_names(query_params, param, available):
+        names = [
+            name.strip()
+            for name in query_params.get(param, '').split(',')
+            if name.strip()
+        ]
+        unknown = set(names) - set(available)
+        if unknown:
+            raise ValidationError({
+                param: f'Неизвестные поля: {", ".join(sorted(unknown))}'
+            })
+        return names
+
+    @classmethod
+    def get_fieldset(cls, query_params):
+        """Запрошенные поля в порядке Meta.fields и раскрываемые связи."""
+        requested = cls.parse_names(query_params, 'fields', cls.Meta.fields)
+        fields = tuple(
+            name for name in cls.Meta.fields
+            if not requested or name in requested
+        )
+        if 'expand' not in query_params:
+            return fields, tuple(cls.expandable_fields)
+        return fields, cls.parse_names(
+            query_params, 'expand', cls.expandable_fields
+        )
+
+
+class TitleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Сериализатор модели Title."""
 
+    expandable_fields = {'genre': 'slug', 'category': 'slug'}
+
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
     rating = serializers.IntegerField(default=0, read_only=True)
@@ -184,6 +310,153 @@ class TitleSerializer(serializers.ModelSerializer):
                             )
 
 
+class ValuesSerializer:
+    """Сериализатор списков только для чтения: строит ответ из строк
+    .values() без создания объектов моделей и полей DRF.
+
+    Ответ должен совпадать с ответом обычного сериализатора того же
+    ресурса.
+    """
+
+    values = ()
+    format_datetime = staticmethod(
+        serializers.DateTimeField().to_representation
+    )
+
+    def __init__(self, context=None):
+        self.context = context or {}
+
+    def get_values(self, queryset):
+        return queryset.values(*self.values)
+
+    def prepare(self, rows):
+        """Загружает данные, общие для всех строк страницы."""
+
+    def to_row(self, row):
+        raise NotImplementedError('.to_row() must be overridden')
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        self.prepare(rows)
+        return [self.to_row(row) for row in rows]
+
+
+class ReviewValuesSerializer(ValuesSerializer):
+    """Список отзывов, совпадающий с ответом ReviewSerializer."""
+
+    values = ('id', 'text', 'author__username', 'score', 'pub_date')
+
+    def to_row(self, row):
+        return {
+            'id': row['id'],
+            'text': row['text'],
+            'author': row['author__username'],
+            'score': row['score'],
+            'pub_date': self.format_datetime(row['pub_date']),
+        }
+
+
+class CommentValuesSerializer(ValuesSerializer):
+    """Список комментариев, совпадающий с ответом CommentSerializer."""
+
+    values = ('id', 'text', 'author__username', 'pub_date')
+
+    def to_row(self, row):
+        return {
+            'id': row['id'],
+            'text': row['text'],
+            'author': row['author__username'],
+            'pub_date': self.format_datetime(row['pub_date']),
+        }
+
+
+class TitleValuesSerializer(ValuesSerializer):
+    """Список произведений, совпадающий с ответом TitleSerializer, с
+    учётом ?fields= и ?expand=.
+
+    Жанры всей страницы загружаются одним запросом.
+    """
+
+    def __init__(self, context=None):
+        super().__init__(context)
+        request = self.context.get('request')
+        if request is None:
+            self.fields = TitleSerializer.Meta.fields
+            self.expanded = tuple(TitleSerializer.expandable_fields)
+        else:
+            self.fields, self.expanded = TitleSerializer.get_fieldset(
+                request.query_params
+            )
+        self.genres = {}
+
+    def get_values(self, queryset):
+        columns = ['id'] + [
+            name for name in self.fields
+            if name not in TitleSerializer.expandable_fields
+            and name != 'id'
+        ]
+        if 'category' in self.fields:
+            columns.append('category__slug')
+            if 'category' in self.expanded:
+                columns.append('category__name')
+        return queryset.prefetch_related(None).values(*columns)
+
+    def prepare(self, rows):
+        if 'genre' not in self.fields:
+            return
+        expanded = 'genre' in self.expanded
+        self.genres = {}
+        links = GenreTitle.objects.filter(
+            title_id__in=[row['id'] for row in rows], genre__isnull=False
+        ).order_by('genre__name').values_list(
+            'title_id', 'genre__name', 'genre__slug'
+        )
+        for title_id, name, slug in links:
+            self.genres.setdefault(title_id, []).append(
+                {'name': name, 'slug': slug} if expanded else slug
+            )
+
+    def get_category(self, row):
+        slug = row['category__slug']
+        if slug is None or 'category' not in self.expanded:
+            return slug
+        return {'name': row['category__name'], 'slug': slug}
+
+    def to_row(self, row):
+        data = {}
+        for name in self.fields:
+            if name == 'genre':
+                data[name] = self.genres.get(row['id'], [])
+            elif name == 'category':
+                data[name] = self.get_category(row)
+            elif name == 'rating':
+                rating = row['rating']
+                data[name] = None if rating is None else int(rating)
+            else:
+                data[name] = row[name]
+        return data
+
+
+class LeaderboardValuesSerializer(ValuesSerializer):
+    """Страница рейтинга произведений."""
+
+    values = (
+        'title_id', 'title__name', 'title__year', 'title__rating',
+        'title__rating_count', 'score',
+    )
+
+    def to_row(self, row):
+        rating = row['title__rating']
+        return {
+            'id': row['title_id'],
+            'name': row['title__name'],
+            'year': row['title__year'],
+            'rating': None if rating is None else int(rating),
+            'votes': row['title__rating_count'],
+            'weighted_rating': finite(round(row['score'], 2)),
+        }
+
+
 class TitlePostSerializer(serializers.ModelSerializer):
     """Cериализатор модели Title для изменения информации
     в ответе (response)."""
@@ -213,4 +486,24 @@ class TitlePostSerializer(serializers.ModelSerializer):
         return value
 
     def to_representation(self, instance):
-        return TitleSerializer(instance).data
+        return TitleSerializer(instance, context=self.context).data
+
+
+class RatingStatsSerializer(serializers.Serializer):
+    """Сериализатор распределения оценок произведения."""
+
+    count = serializers.IntegerField()
+    mean = FiniteFloatField(allow_null=True)
+    median = FiniteFloatField(allow_null=True)
+    histogram = serializers.DictField(child=serializers.IntegerField())
+
+
+class SearchResultSerializer(serializers.Serializer):
+    """Сериализатор результата полнотекстового поиска."""
+
+    type = serializers.ChoiceField(choices=SEARCH_KINDS)
+    id = serializers.IntegerField()
+    title_id = serializers.IntegerField()
+    review_id = serializers.IntegerField(allow_null=True)
+    snippet = serializers.CharField()
+    rank = FiniteFloatField()
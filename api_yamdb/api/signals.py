@@ -0,0 +1,73 @@
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_save
+)
+from django.dispatch import receiver
+
+from api.caching import bump_version_on_commit
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import ProjectUser
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_cached_lists(sender, **kwargs):
+    bump_version_on_commit(sender._meta.model_name)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_version_on_commit('title')
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_title(sender, instance, **kwargs):
+    instance._previous_title_id = getattr(
+        instance, '_loaded_values', {}
+    ).get('title_id')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_reviews(sender, instance, **kwargs):
+    # Рейтинг выводится вместе с произведением.
+    namespaces = ['title', f'review:{instance.title_id}']
+    previous = getattr(instance, '_previous_title_id', None)
+    if previous is not None and previous != instance.title_id:
+        namespaces.append(f'review:{previous}')
+    bump_version_on_commit(*namespaces)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comments(sender, instance, **kwargs):
+    bump_version_on_commit(f'comment:{instance.review_id}')
+
+
+@receiver(pre_save, sender=ProjectUser)
+def remember_username_change(sender, instance, update_fields=None,
+                             **kwargs):
+    if update_fields is not None and 'username' not in update_fields:
+        instance._username_changed = False
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    instance._username_changed = (
+        loaded.get('username') != instance.username
+    )
+
+
+@receiver(post_save, sender=ProjectUser)
+def invalidate_authors(sender, instance, created, **kwargs):
+    # Из полей пользователя в отзывах и комментариях выводится только
+    # имя автора.
+    if not created and getattr(instance, '_username_changed', True):
+        bump_version_on_commit('user')
+
+
+@receiver(post_delete, sender=ProjectUser)
+def invalidate_deleted_author(sender, **kwargs):
+    bump_version_on_commit('user')
@@ -0,0 +1,226 @@
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework import throttling
+
+from api_yamdb.shared_cache import get_shared_cache
+
+
+class CacheThrottleStore:
+    """Счётчики в кеше shared, общем для всех процессов.
+
+    Кеш в памяти процесса для него не допускается: каждый процесс считал
+    бы запросы отдельно, а переполнение кеша сбрасывало бы счётчики.
+    """
+
+    def get_many(self, keys):
+        return get_shared_cache().get_many(keys)
+
+    def incr(self, key, timeout):
+        cache = get_shared_cache()
+        cache.add(key, 0, timeout)
+        try:
+            value = cache.incr(key)
+        except ValueError:
+            # Ключ успел истечь между add и incr.
+            cache.set(key, 1, timeout)
+            return 1
+        # incr в DatabaseCache перезаписывает значение со сроком хранения
+        # по умолчанию, который короче окна.
+        cache.touch(key, timeout)
+        return value
+
+
+class MemoryThrottleStore:
+    """Счётчики в памяти процесса.
+
+    Как основное хранилище подходит только для тестов и разработки: с
+    несколькими процессами лимит действует в каждом отдельно. Как
+    AUTH_THROTTLE_LOCAL_STORE отклоняет повторы, пришедшие в тот же
+    процесс, без обращения к общему кешу. Когда счётчиков становится
+    больше max_entries, истёкшие удаляются, а если не помогло - все.
+    """
+
+    max_entries = 10000
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key, now):
+        value, expires = self._counters.get(key, (0, now))
+        return value if expires > now else 0
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            return {key: self._get(key, now) for key in keys}
+
+    def incr(self, key, timeout):
+        now = time.monotonic()
+        with self._lock:
+            value = self._get(key, now) + 1
+            self._counters[key] = (value, now + timeout)
+            if len(self._counters) > self.max_entries:
+                self._cull(now)
+        return value
+
+    def _cull(self, now):
+        self._counters = {
+            key: entry for key, entry in self._counters.items()
+            if entry[1] > now
+        }
+        if len(self._counters) > self.max_entries:
+            self._counters.clear()
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+@lru_cache(maxsize=None)
+def get_store(path):
+    return import_string(path)()
+
+
+class SlidingWindowThrottle(throttling.SimpleRateThrottle):
+    """Ограничение частоты запросов по скользящему окну.
+
+    Для каждого идентификатора хранятся счётчики текущего и предыдущего
+    окна; число запросов за последние duration секунд оценивается как
+    счётчик текущего окна плюс доля предыдущего, ещё попадающая в
+    скользящее окно. Лимиты задаются в AUTH_THROTTLE_RATES, хранилище
+    счётчиков - в AUTH_THROTTLE_STORE.
+
+    Перед общим хранилищем проверяются счётчики процесса из
+    AUTH_THROTTLE_LOCAL_STORE: они не больше общих, поэтому превышение в
+    них отклоняет запрос без обращения к общему кешу.
+    """
+
+    cache_format = 'throttle:%(scope)s:%(ident)s:%(window)s'
+
+    def get_rate(self):
+        return settings.AUTH_THROTTLE_RATES.get(self.scope)
+
+    def get_idents(self, request):
+        raise NotImplementedError('.get_idents() must be overridden')
+
+    def get_key(self, ident, window):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': ident, 'window': window
+        }
+
+    def get_stores(self):
+        paths = [settings.AUTH_THROTTLE_STORE]
+        local = settings.AUTH_THROTTLE_LOCAL_STORE
+        if local and local not in paths:
+            paths.insert(0, local)
+        return [get_store(path) for path in paths]
+
+    def over_limit(self, store, idents, window):
+        counters = store.get_many([
+            self.get_key(ident, number) for ident in idents
+            for number in (window - 1, window)
+        ])
+        for ident in idents:
+            self.previous = counters.get(self.get_key(ident, window - 1), 0)
+            self.current = counters.get(self.get_key(ident, window), 0)
+            estimate = self.previous * (1 - self.elapsed) + self.current
+            if estimate >= self.num_requests:
+                return True
+        return False
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        idents = self.get_idents(request)
+        if not idents:
+            return True
+        stores = self.get_stores()
+        self.now = self.timer()
+        window, offset = divmod(self.now, self.duration)
+        window = int(window)
+        self.elapsed = offset / self.duration
+        for store in stores:
+            if self.over_limit(store, idents, window):
+                return self.throttle_failure()
+        for store in stores:
+            for ident in idents:
+                store.incr(self.get_key(ident, window), 2 * self.duration)
+        return self.throttle_success()
+
+    def throttle_success(self):
+        return True
+
+    def wait(self):
+        window_left = self.duration * (1 - self.elapsed)
+        if self.current >= self.num_requests or not self.previous:
+            return window_left
+        # Момент, когда доля предыдущего окна перестанет превышать лимит.
+        free = 1 - (self.num_requests - self.current) / self.previous
+        return max((free - self.elapsed) * self.duration, 1)
+
+
+class FailFastThrottleMixin:
+    """Отклоняет запрос на первом превышенном ограничении.
+
+    APIView проверяет все ограничения, даже если запрос уже отклонён, и
+    каждое из них обращалось бы к общему кешу.
+    """
+
+    def check_throttles(self, request):
+        for throttle in self.get_throttles():
+            if not throttle.allow_request(request, self):
+                self.throttled(request, throttle.wait())
+
+
+class IPThrottle(SlidingWindowThrottle):
+    """Ограничение по IP-адресу клиента.
+
+    Адрес берётся из X-Forwarded-For только за NUM_PROXIES доверенными
+    прокси, иначе - из REMOTE_ADDR.
+    """
+
+    def get_idents(self, request):
+        return [self.get_ident(request)]
+
+
+class FieldsThrottle(SlidingWindowThrottle):
+    """Ограничение по значениям полей запроса, каждое считается
+    отдельно."""
+
+    fields = ()
+
+    def get_idents(self, request):
+        data = request.data if hasattr(request.data, 'get') else {}
+        return [
+            f'{field}:{value.strip().lower()}'
+            for field in self.fields
+            for value in [data.get(field)]
+            if isinstance(value, str) and value.strip()
+        ]
+
+
+class SignupIPThrottle(IPThrottle):
+    scope = 'signup_ip'
+
+
+class SignupIdentityThrottle(FieldsThrottle):
+    scope = 'signup_identity'
+    fields = ('username', 'email')
+
+
+class TokenIPThrottle(IPThrottle):
+    scope = 'token_ip'
+
+
+class TokenRefreshIPThrottle(IPThrottle):
+    scope = 'token_refresh_ip'
+
+
+class TokenIdentityThrottle(FieldsThrottle):
+    scope = 'token_identity'
+    fields = ('username',)
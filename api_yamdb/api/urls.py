@@ -3,7 +3,7 @@ from rest_framework.routers import DefaultRouter
 
 from api.views import (
     CategoryViewSet, CommentViewSet,
-    GenreViewSet, ReviewViewSet,
+    GenreViewSet, LeaderboardViewSet, ReviewViewSet, SearchViewSet,
     TitleViewSet, UserViewSet
 )
 
@@ -13,6 +13,10 @@ router_v1.register('users', UserViewSet, basename='users')
 router_v1.register('categories', CategoryViewSet, basename='categories')
 router_v1.register('genres', GenreViewSet, basename='genres')
 router_v1.register('titles', TitleViewSet, basename='titles')
+router_v1.register('search', SearchViewSet, basename='search')
+router_v1.register(
+    'leaderboards', LeaderboardViewSet, basename='leaderboards'
+)
 router_v1.register(
     r'titles/(?P<title_id>\d+)/reviews/(?P<review_id>\d+)/comments',
     CommentViewSet, basename='comments'
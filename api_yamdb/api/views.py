@@ -1,25 +1,114 @@
-from django.db.models import Avg
+from django.db.models import Prefetch
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from reviews.models import Category, Genre, Review, Title
+from reviews.models import (
+    SCORE_FIELDS, SCORES, Category, Comment, Genre, LeaderboardEntry,
+    RatingHistogram, Review, Title
+)
+from reviews.search import SEARCH_KINDS, SearchResults
 from users.models import ProjectUser
-from api.filters import TitleFilter
+from api.caching import (
+    CachedListMixin, ConditionalGetMixin, ConditionalListMixin
+)
+from api.filters import StableOrderingFilter, TitleFilter
+from api.pagination import LeaderboardCursorPagination, OptInCursorPagination
 from api.permissions import (
     IsAdmin, IsAdminOrReadOnly, IsAuthorOrAdminOrModeratorOrReadOnly
 )
 from api.serializers import (
-    CategorySerializer, CommentSerializer, GenreSerializer,
-    ReviewSerializer, TitlePostSerializer, TitleSerializer,
+    CategorySerializer, CommentSerializer, CommentValuesSerializer,
+    GenreSerializer, LeaderboardValuesSerializer, RatingStatsSerializer,
+    ReviewSerializer,
+    ReviewValuesSerializer, SearchResultSerializer, TitlePostSerializer,
+    TitleSerializer, TitleValuesSerializer, TokenRefreshSerializer,
     UserCreateSerializer, UserSerializer, UserTokenSerializer
 )
+from api.throttling import (
+    FailFastThrottleMixin, SignupIdentityThrottle, SignupIPThrottle,
+    TokenIdentityThrottle, TokenIPThrottle, TokenRefreshIPThrottle
+)
 
 
-class AdministratorViewSet(mixins.CreateModelMixin, mixins.ListModelMixin,
-                           mixins.DestroyModelMixin, viewsets.GenericViewSet):
+class ValuesListMixin:
+    """Отдаёт list() через values_serializer_class: строки берутся из
+    .values() того же отфильтрованного queryset и пагинируются как
+    обычно. Без values_serializer_class работает обычный list()."""
+
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.values_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        serializer = self.values_serializer_class(
+            context=self.get_serializer_context()
+        )
+        queryset = serializer.get_values(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(serializer.to_representation(queryset))
+        return self.get_paginated_response(
+            serializer.to_representation(page)
+        )
+
+
+class NestedResourceMixin:
+    """Вложенный ресурс, родитель которого задан параметрами URL.
+
+    parent_lookups сопоставляет поля родительской модели parent_model
+    параметрам URL, ключ 'pk' обязателен; parent_field - внешний ключ
+    на родителя в модели ресурса. Родитель проверяется не больше одного
+    раза за запрос и только запросом exists(): для списка и создания
+    нужен лишь его id, а объект детального маршрута ищется сразу по
+    параметрам родителя.
+    """
+
+    parent_model = None
+    parent_lookups = {}
+    parent_field = None
+
+    def get_parent_filter(self, prefix=''):
+        return {
+            f'{prefix}{field}': self.kwargs[kwarg]
+            for field, kwarg in self.parent_lookups.items()
+        }
+
+    def check_parent(self):
+        if getattr(self, '_parent_checked', False):
+            return
+        if not self.parent_model.objects.filter(
+            **self.get_parent_filter()
+        ).exists():
+            raise Http404
+        self._parent_checked = True
+
+    def get_parent_id(self):
+        """id родителя, существование которого проверено."""
+        self.check_parent()
+        return int(self.kwargs[self.parent_lookups['pk']])
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if (self.lookup_url_kwarg or self.lookup_field) in self.kwargs:
+            return queryset.filter(
+                **self.get_parent_filter(f'{self.parent_field}__')
+            )
+        return queryset.filter(
+            **{f'{self.parent_field}_id': self.get_parent_id()}
+        )
+
+
+class AdministratorViewSet(CachedListMixin, mixins.CreateModelMixin,
+                           mixins.ListModelMixin, mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
     """Вьюсет для операций create/list/retrieve."""
 
     permission_classes = (IsAdminOrReadOnly,)
@@ -46,7 +135,7 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(permissions.IsAuthenticated,)
     )
     def get_me_data(self, request):
-        user = get_object_or_404(ProjectUser, username=self.request.user)
+        user = get_object_or_404(ProjectUser, pk=request.user.pk)
         serializer = UserSerializer(user)
         if request.method == 'PATCH':
             serializer = UserSerializer(
@@ -56,10 +145,11 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class UserCreateViewSet(APIView):
+class UserCreateViewSet(FailFastThrottleMixin, APIView):
     """Вьюсет для регистрации."""
 
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (SignupIPThrottle, SignupIdentityThrottle)
 
     def post(self, request):
         serializer = UserCreateSerializer(data=request.data)
@@ -68,10 +158,11 @@ class UserCreateViewSet(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class UserTokenViewSet(APIView):
+class UserTokenViewSet(FailFastThrottleMixin, APIView):
     """Вьюсет для токена."""
 
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (TokenIPThrottle, TokenIdentityThrottle)
 
     def post(self, request):
         serializer = UserTokenSerializer(data=request.data)
@@ -79,11 +170,24 @@ class UserTokenViewSet(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class TokenRefreshViewSet(FailFastThrottleMixin, APIView):
+    """Вьюсет для обновления токенов."""
+
+    permission_classes = (permissions.AllowAny,)
+    throttle_classes = (TokenRefreshIPThrottle,)
+
+    def post(self, request):
+        serializer = TokenRefreshSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
 class CategoryViewSet(AdministratorViewSet):
     """Вьюсет для модели Category."""
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_namespace = 'category'
 
 
 class GenreViewSet(AdministratorViewSet):
@@ -91,56 +195,208 @@ class GenreViewSet(AdministratorViewSet):
 
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_namespace = 'genre'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ConditionalGetMixin, ValuesListMixin,
+                   viewsets.ModelViewSet):
     """Вьюсет для модели Title."""
 
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score'))
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
     serializer_class = TitleSerializer
+    values_serializer_class = TitleValuesSerializer
     permission_classes = (IsAdminOrReadOnly,)
     http_method_names = ['get', 'post', 'patch', 'delete']
+    filter_backends = (DjangoFilterBackend, StableOrderingFilter)
     filterset_class = TitleFilter
     filterset_fields = ('name',)
+    ordering_fields = ('name', 'year', 'rating', 'rating_count')
     ordering = ('name',)
 
+    def get_queryset(self):
+        if self.request.method not in permissions.SAFE_METHODS:
+            return super().get_queryset()
+        return self.get_fieldset_queryset(
+            *TitleSerializer.get_fieldset(self.request.query_params)
+        )
+
+    def get_fieldset_queryset(self, fields, expanded):
+        """Загружает только нужные ответу столбцы и связи."""
+        columns = [
+            name for name in fields
+            if name not in TitleSerializer.expandable_fields
+        ]
+        queryset = Title.objects.all()
+        if 'category' in fields:
+            columns.append('category__slug')
+            if 'category' in expanded:
+                columns.append('category__name')
+            queryset = queryset.select_related('category')
+        if 'genre' in fields:
+            genre_columns = (
+                ('name', 'slug') if 'genre' in expanded else ('slug',)
+            )
+            queryset = queryset.prefetch_related(Prefetch(
+                'genre', queryset=Genre.objects.only(*genre_columns)
+            ))
+        return queryset.only(*columns)
+
     def get_serializer_class(self):
         if self.request.method in ['POST', 'PUT', 'PATCH']:
             return TitlePostSerializer
         return TitleSerializer
 
-
-class ReviewViewSet(viewsets.ModelViewSet):
+    def get_version_namespaces(self):
+        return ('title', 'category', 'genre')
+
+    @action(detail=True, url_path='rating-stats')
+    def rating_stats(self, request, pk=None):
+        """Число, среднее, медиана и распределение оценок произведения."""
+        return self.conditional(self.get_rating_stats, request, pk=pk)
+
+    def get_rating_stats(self, request, pk=None):
+        # Одним запросом проверяется произведение и читается гистограмма;
+        # у произведения без отзывов её строки может не быть. Нечисловой
+        # pk, как и в get_object(), означает 404.
+        try:
+            row = Title.objects.filter(pk=pk).values(
+                *(f'histogram__{field}' for field in SCORE_FIELDS)
+            ).first()
+        except (TypeError, ValueError):
+            row = None
+        if row is None:
+            raise Http404
+        counts = {
+            score: row[f'histogram__{field}'] or 0
+            for score, field in zip(SCORES, SCORE_FIELDS)
+        }
+        serializer = RatingStatsSerializer({
+            **RatingHistogram.summary(counts),
+            'histogram': {
+                str(score): count for score, count in counts.items()
+            },
+        })
+        return Response(serializer.data)
+
+
+class ReviewViewSet(ConditionalGetMixin, NestedResourceMixin,
+                    ValuesListMixin, viewsets.ModelViewSet):
     """Вьюсет для модели Review."""
 
+    queryset = Review.objects.select_related('author')
+    parent_model = Title
+    parent_lookups = {'pk': 'title_id'}
+    parent_field = 'title'
     serializer_class = ReviewSerializer
+    values_serializer_class = ReviewValuesSerializer
     permission_classes = (IsAuthorOrAdminOrModeratorOrReadOnly,)
+    pagination_class = OptInCursorPagination
     http_method_names = ['get', 'post', 'patch', 'delete']
 
-    def get_title(self):
-        return get_object_or_404(Title, id=self.kwargs['title_id'])
-
-    def get_queryset(self):
-        return self.get_title().reviews.all()
+    def get_version_namespaces(self):
+        return (f'review:{self.kwargs["title_id"]}', 'user')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(
+            author_id=self.request.user.pk, title_id=self.get_parent_id()
+        )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, NestedResourceMixin,
+                     ValuesListMixin, viewsets.ModelViewSet):
     """Вьюсет для модели Comment."""
 
+    queryset = Comment.objects.select_related('author')
+    parent_model = Review
+    parent_lookups = {'pk': 'review_id', 'title_id': 'title_id'}
+    parent_field = 'review'
     serializer_class = CommentSerializer
+    values_serializer_class = CommentValuesSerializer
     permission_classes = (IsAuthorOrAdminOrModeratorOrReadOnly,)
+    pagination_class = OptInCursorPagination
     http_method_names = ['get', 'post', 'patch', 'delete']
 
-    def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs['review_id'],
-                                 title_id=self.kwargs['title_id'])
-
-    def get_queryset(self):
-        return self.get_review().comments.all()
+    def get_version_namespaces(self):
+        return (f'comment:{self.kwargs["review_id"]}', 'user')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(
+            author_id=self.request.user.pk, review_id=self.get_parent_id()
+        )
+
+
+class LeaderboardViewSet(ConditionalListMixin, ValuesListMixin,
+                         mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Рейтинг произведений по взвешенной оценке: общий или по жанру
+    (?genre=<slug>), категории (?category=<slug>) или году (?year=)."""
+
+    queryset = LeaderboardEntry.objects.all()
+    values_serializer_class = LeaderboardValuesSerializer
+    pagination_class = LeaderboardCursorPagination
+    filter_backends = ()
+    board_models = {
+        LeaderboardEntry.GENRE: Genre,
+        LeaderboardEntry.CATEGORY: Category,
+    }
+
+    def get_version_namespaces(self):
+        return ('title', 'category', 'genre')
+
+    def get_board(self):
+        params = self.request.query_params
+        boards = [
+            board for board in (
+                LeaderboardEntry.GENRE, LeaderboardEntry.CATEGORY,
+                LeaderboardEntry.YEAR
+            )
+            if board in params
+        ]
+        if len(boards) > 1:
+            raise ValidationError(
+                'Укажите только один из параметров genre, category, year'
+            )
+        if not boards:
+            return LeaderboardEntry.GLOBAL, 0
+        board = boards[0]
+        if board == LeaderboardEntry.YEAR:
+            try:
+                return board, int(params[board])
+            except ValueError:
+                raise ValidationError({board: 'Год должен быть числом'})
+        key = self.board_models[board].objects.filter(
+            slug=params[board]
+        ).values_list('pk', flat=True).first()
+        if key is None:
+            raise Http404
+        return board, key
+
+    def get_queryset(self):
+        board, key = self.get_board()
+        return super().get_queryset().filter(
+            board=board, key=key, score__isnull=False
+        )
+
+
+class SearchViewSet(viewsets.GenericViewSet):
+    """Вьюсет полнотекстового поиска по произведениям, отзывам и
+    комментариям."""
+
+    serializer_class = SearchResultSerializer
+    filter_backends = ()
+
+    def list(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'Укажите строку поиска'})
+        kinds = request.query_params.get('type')
+        kinds = kinds.split(',') if kinds else SEARCH_KINDS
+        unknown = set(kinds) - set(SEARCH_KINDS)
+        if unknown:
+            raise ValidationError({
+                'type': f'Неизвестный тип: {", ".join(sorted(unknown))}'
+            })
+        page = self.paginate_queryset(SearchResults(query, kinds))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
@@ -4,6 +4,11 @@ FIRST_NAME_MAX_LENGTH = 150
 LAST_NAME_MAX_LENGTH = 150
 ROLE_MAX_LENGTH = 50
 COD_MAX_LENGTH = 254
+OUTBOX_SUBJECT_MAX_LENGTH = 255
+OUTBOX_STATUS_MAX_LENGTH = 16
+JTI_MAX_LENGTH = 255
+LEADERBOARD_BOARD_MAX_LENGTH = 16
+SHARED_CACHE = 'shared'
 USER = 'user'
 ADMIN = 'admin'
 MODERATOR = 'moderator'
@@ -17,3 +22,10 @@ LIMIT_NAME_TEXT = 256
 MIN_VALUE = 1
 MAX_SCOPE_VALUE = 10
 CHECK_USERNAME = r'^[\w.@+-]+\Z'
+SEARCH_HIGHLIGHT_START = '<b>'
+SEARCH_HIGHLIGHT_END = '</b>'
+# Символы из области для частного использования, которыми СУБД отмечает
+# совпадения до экранирования HTML в тексте фрагмента.
+SEARCH_MARK_START = '\ue000'
+SEARCH_MARK_END = '\ue001'
+SEARCH_SNIPPET_WORDS = 16
@@ -0,0 +1,351 @@
+import hashlib
+import json
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from api_yamdb.shared_cache import get_shared_cache
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = [*zip(labelnames, values), *extra]
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"')
+         .replace('\n', r'\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Метрика с набором меток; значения хранятся по кортежу меток."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels[name] for name in self.labelnames)
+
+    def samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        lines.extend(
+            f'{name}{labels} {_format_value(value)}'
+            for name, labels, value in self.samples()
+        )
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield (
+                f'{self.name}_total',
+                _format_labels(self.labelnames, key), value
+            )
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными границами корзин.
+
+    observe() находит корзину двоичным поиском и увеличивает один
+    счётчик; накопленные суммы считаются только при выгрузке.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [
+                    [0] * (len(self.buckets) + 1), 0
+                ]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def snapshot(self):
+        """Пары (метки, (счётчики корзин, сумма)) в порядке меток."""
+        with self._lock:
+            return sorted(
+                (key, (list(counts), total))
+                for key, (counts, total) in self._values.items()
+            )
+
+    def samples(self):
+        for key, (counts, total) in self.snapshot():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float('inf')), counts):
+                cumulative += count
+                yield (
+                    f'{self.name}_bucket',
+                    _format_labels(
+                        self.labelnames, key,
+                        (('le', _format_value(float(bound))),)
+                    ),
+                    cumulative
+                )
+            labels = _format_labels(self.labelnames, key)
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+
+def _shared_key(name, key):
+    # Метки могут содержать пробелы, недопустимые в ключах memcached.
+    digest = hashlib.md5(json.dumps(list(key)).encode()).hexdigest()
+    return f'metrics:{name}:{digest}'
+
+
+def _shared_incr(name, key, amount):
+    """Увеличивает значение метрики в общем кеше и добавляет набор меток
+    в индекс метрики, по которому значения читаются при выгрузке."""
+    cache = get_shared_cache()
+    value_key = _shared_key(name, key)
+    if not cache.add(value_key, amount, None):
+        try:
+            cache.incr(value_key, amount)
+        except ValueError:
+            cache.add(value_key, amount, None)
+        else:
+            # incr() некоторых бэкендов сбрасывает срок хранения.
+            cache.touch(value_key, None)
+    index_key = f'metrics:{name}'
+    index = cache.get(index_key, [])
+    if list(key) not in index:
+        cache.set(index_key, [*index, list(key)], None)
+
+
+def _shared_values(name):
+    """Пары (набор меток, значение) метрики из общего кеша."""
+    cache = get_shared_cache()
+    keys = {
+        _shared_key(name, key): tuple(key)
+        for key in cache.get(f'metrics:{name}', [])
+    }
+    values = cache.get_many(keys)
+    return sorted(
+        (key, values[value_key]) for value_key, key in keys.items()
+        if value_key in values
+    )
+
+
+class SharedCounter(Counter):
+    """Счётчик, значения которого хранятся в общем кеше.
+
+    Его увеличивают команды manage.py (загрузка CSV, отправка писем), а
+    выгружает веб-процесс, которому память другого процесса недоступна.
+    """
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def inc(self, amount=1, **labels):
+        _shared_incr(self.name, self._key(labels), amount)
+
+    def samples(self):
+        for key, value in _shared_values(self.name):
+            yield (
+                f'{self.name}_total',
+                _format_labels(self.labelnames, key), value
+            )
+
+
+class SharedHistogram(Histogram):
+    """Гистограмма, значения которой хранятся в общем кеше.
+
+    Каждая корзина - отдельный счётчик; сумма хранится в микросекундах,
+    потому что incr() некоторых бэкендов работает только с целыми.
+    """
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        _shared_incr(self.name, (*key, str(index)), 1)
+        _shared_incr(self.name, (*key, 'sum'), round(value * 1e6))
+
+    def snapshot(self):
+        entries = {}
+        for (*key, part), value in _shared_values(self.name):
+            entry = entries.setdefault(
+                tuple(key), [[0] * (len(self.buckets) + 1), 0]
+            )
+            if part == 'sum':
+                entry[1] = value / 1e6
+            else:
+                entry[0][int(part)] = value
+        return sorted(
+            (key, (counts, total)) for key, (counts, total) in entries.items()
+        )
+
+
+class Registry:
+    """Реестр метрик процесса.
+
+    Помимо метрик, обновляемых по ходу работы, хранит функции, которые
+    выставляют значения только в момент выгрузки (например, читают
+    состояние очереди писем из БД). Метрики команд manage.py
+    (SharedCounter, SharedHistogram) читаются из общего кеша.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics)
+        for collector in collectors:
+            collector()
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+requests_total = registry.register(Counter(
+    'http_requests', 'Число запросов к API.', ('route', 'method', 'status')
+))
+request_duration = registry.register(Histogram(
+    'http_request_duration_seconds', 'Время обработки запроса.',
+    ('route', 'method')
+))
+request_queries = registry.register(Histogram(
+    'http_request_db_queries', 'Число SQL-запросов на один запрос к API.',
+    ('route',), QUERY_BUCKETS
+))
+request_db_duration = registry.register(Histogram(
+    'http_request_db_duration_seconds',
+    'Суммарное время SQL-запросов на один запрос к API.', ('route',)
+))
+response_cache_total = registry.register(Counter(
+    'api_response_cache', 'Обращения к кешу ответов API.',
+    ('namespace', 'result')
+))
+import_rows_total = registry.register(SharedCounter(
+    'import_rows', 'Строки CSV, обработанные загрузчиком.',
+    ('model', 'result')
+))
+import_jobs_total = registry.register(SharedCounter(
+    'import_jobs', 'Загрузки CSV-файлов.', ('model', 'status')
+))
+import_duration = registry.register(SharedHistogram(
+    'import_duration_seconds', 'Время загрузки одного CSV-файла.',
+    ('model',), (1, 5, 10, 30, 60, 300, 600, 1800)
+))
+
+
+def observe_request(request, response, duration, metrics=None):
+    match = request.resolver_match
+    route = match.view_name if match else 'unresolved'
+    requests_total.inc(
+        route=route, method=request.method, status=response.status_code
+    )
+    request_duration.observe(duration, route=route, method=request.method)
+    if metrics is not None:
+        request_queries.observe(metrics.queries, route=route)
+        request_db_duration.observe(metrics.db_time, route=route)
+
+
+def observe_import(model, result):
+    name = model._meta.label
+    if isinstance(result, Exception):
+        import_jobs_total.inc(model=name, status='error')
+        return
+    import_jobs_total.inc(model=name, status='ok')
+    import_rows_total.inc(result.accepted, model=name, result='accepted')
+    import_rows_total.inc(result.skipped, model=name, result='skipped')
+    import_rows_total.inc(result.rejected, model=name, result='rejected')
+    import_duration.observe(result.seconds, model=name)
+
+
+def metrics_view(request):
+    """Метрики процесса в текстовом формате Prometheus.
+
+    Запрос должен передать METRICS_TOKEN в заголовке Authorization:
+    Bearer <токен>. Без настроенного токена метрики отдаются только при
+    DEBUG.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse(status=403)
+    elif not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
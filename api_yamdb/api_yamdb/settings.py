@@ -1,3 +1,4 @@
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -26,6 +27,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,6 +65,47 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Кеш, общий для всех процессов: версии токенов и счётчики лимитов
+    # запросов. Кеш в памяти процесса для него не допускается. Таблица
+    # для DatabaseCache создаётся командой createcachetable.
+    'shared': {
+        'BACKEND': os.getenv(
+            'SHARED_CACHE_BACKEND',
+            'django.core.cache.backends.db.DatabaseCache'
+        ),
+        'LOCATION': os.getenv('SHARED_CACHE_LOCATION', 'shared_cache'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+# Доля запросов, для которых собираются метрики (лог api.requests, а при
+# DEBUG и заголовок Server-Timing), и длительность запроса, после которой в
+# лог пишется SQL.
+REQUEST_METRICS_SAMPLE_RATE = float(
+    os.getenv('REQUEST_METRICS_SAMPLE_RATE', 0.01)
+)
+REQUEST_METRICS_SQL_THRESHOLD_MS = 500
+# Токен для доступа к /metrics; если не задан, эндпоинт доступен только
+# при DEBUG.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.requests': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -95,15 +138,45 @@ STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 AUTH_USER_MODEL = 'users.ProjectUser'
 
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
+    'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
+    'ROTATE_REFRESH_TOKENS': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
 }
+# Сколько секунд процесс доверяет закешированной версии пользователя.
+TOKEN_VERSION_CACHE_TTL = 5
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 DEFAULT_FROM_EMAIL = 'yamdb@yamdb.com'
 
+# Очередь писем: при OUTBOX_EAGER письма отправляются прямо из запроса,
+# иначе их доставляет команда send_outbox.
+OUTBOX_EAGER = False
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 30
+OUTBOX_LEASE = 5 * 60
+
+# Лимиты запросов к эндпоинтам регистрации и получения токена.
+AUTH_THROTTLE_RATES = {
+    'signup_ip': '20/hour',
+    'signup_identity': '5/hour',
+    'token_ip': '30/min',
+    'token_identity': '10/min',
+    'token_refresh_ip': '60/min',
+}
+# Счётчики хранятся в кеше shared (по умолчанию DatabaseCache, то есть в
+# БД; для высокой нагрузки стоит указать Memcached). Счётчики процесса
+# проверяются первыми и отклоняют повторы, пришедшие в тот же процесс, без
+# обращения к общему кешу.
+AUTH_THROTTLE_STORE = 'api.throttling.CacheThrottleStore'
+AUTH_THROTTLE_LOCAL_STORE = 'api.throttling.MemoryThrottleStore'
+
+# Сколько оценок, равных общему среднему, добавляется к оценкам
+# произведения во взвешенном рейтинге.
+LEADERBOARD_MIN_VOTES = 10
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
@@ -118,6 +191,22 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication',
     ],
+
+    # Без orjson работают как стандартные JSONRenderer и JSONParser.
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+
+    # Число доверенных прокси перед приложением. При 0 клиент определяется
+    # по REMOTE_ADDR, и заголовок X-Forwarded-For, который клиент может
+    # подделать, не влияет на лимиты запросов по IP.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
 }
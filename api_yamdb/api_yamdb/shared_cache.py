@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+from api_yamdb.constants import SHARED_CACHE
+
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def get_shared_cache_error():
+    """Описание ошибки настройки общего кеша или None."""
+    backend = settings.CACHES.get(SHARED_CACHE, {}).get('BACKEND')
+    if backend is None:
+        return f'В CACHES не настроен кеш {SHARED_CACHE!r}.'
+    if backend in PROCESS_LOCAL_BACKENDS:
+        return (
+            f'Кеш {SHARED_CACHE!r} должен быть общим для всех процессов, '
+            f'а {backend} хранит данные в памяти процесса.'
+        )
+    return None
+
+
+def get_shared_cache():
+    """Кеш, общий для всех процессов: версии токенов и счётчики лимитов.
+
+    Записи кеша в памяти процесса не видны другим процессам и
+    вытесняются при переполнении, поэтому с ним отзыв токенов и лимиты
+    запросов можно обойти; такая настройка - ошибка.
+    """
+    error = get_shared_cache_error()
+    if error is not None:
+        raise ImproperlyConfigured(error)
+    return caches[SHARED_CACHE]
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    error = get_shared_cache_error()
+    if error is None:
+        return []
+    return [checks.Error(error, id='api_yamdb.E001')]
@@ -0,0 +1,246 @@
+import csv
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, connections, transaction
+
+from api_yamdb.metrics import observe_import
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_WORKERS = 4
+MAX_REPORTED_ERRORS = 10
+
+
+class ImportResult:
+    """Итог загрузки одного файла."""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = 0
+        self.accepted = 0
+        self.skipped = 0
+        self.rejected = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def reject(self, line, reason):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f'запись {line}: {reason}')
+
+    @property
+    def seconds(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0
+
+
+class InsertedRowsCounter:
+    """Обёртка запросов (connection.execute_wrapper), суммирующая число
+    строк, добавленных в таблицу модели.
+
+    Для INSERT с пропуском конфликтов rowcount равен числу действительно
+    добавленных строк. Запросы к другим таблицам (например, пересчёт
+    гистограмм после загрузки отзывов) не учитываются.
+    """
+
+    def __init__(self, model):
+        self.table = connection.ops.quote_name(model._meta.db_table)
+        self.rows = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        statement = sql.split('(', 1)[0].split()
+        if statement[:1] == ['INSERT'] and statement[-1:] == [self.table]:
+            self.rows += max(context['cursor'].rowcount, 0)
+        return result
+
+
+class CSVImporter:
+    """Потоково загружает CSV-файл в модель пачками через bulk_create.
+
+    Файл читается по `chunk_size` строк, каждая пачка записывается в
+    отдельной транзакции, уже существующие строки пропускаются и
+    учитываются в отчёте отдельно. Внешние
+    ключи проверяются по заранее загруженным множествам id, остальные поля -
+    валидаторами модели; строки с некорректными значениями отбрасываются и
+    попадают в отчёт.
+    """
+
+    def __init__(self, model, path, chunk_size=DEFAULT_CHUNK_SIZE,
+                 db_lock=None):
+        self.model = model
+        self.path = path
+        self.chunk_size = chunk_size
+        self.db_lock = db_lock or nullcontext()
+        self.fields = {}
+        for field in model._meta.concrete_fields:
+            self.fields[field.name] = field
+            self.fields[field.attname] = field
+        self.columns = {}
+        self.id_maps = {}
+
+    def resolve_columns(self, header):
+        unknown = [column for column in header if column not in self.fields]
+        if unknown:
+            raise ValueError(
+                f'В {self.path.name} неизвестные колонки: '
+                f'{", ".join(unknown)}'
+            )
+        self.columns = {column: self.fields[column] for column in header}
+
+    def load_id_maps(self):
+        self.id_maps = {
+            field.attname: set(
+                field.related_model._base_manager.values_list(
+                    'pk', flat=True
+                ).iterator()
+            )
+            for field in self.columns.values() if field.many_to_one
+        }
+
+    def build(self, row):
+        values = {}
+        for column, field in self.columns.items():
+            raw = row[column]
+            if raw is None:
+                raise ValidationError(f'нет значения для {column}')
+            if raw == '' and field.null:
+                values[field.attname] = None
+                continue
+            if not field.many_to_one:
+                values[field.attname] = field.clean(raw, None)
+                continue
+            value = field.to_python(raw)
+            if value not in self.id_maps[field.attname]:
+                raise ValidationError(f'{column}={value} не найден')
+            values[field.attname] = value
+        return self.model(**values)
+
+    def insert(self, objs):
+        """Записывает объекты, пропуская уже существующие строки.
+
+        bulk_create с ignore_conflicts не сообщает, какие строки
+        пропущены, поэтому возвращается число строк, добавленных его
+        запросами INSERT, по rowcount курсора.
+        """
+        counter = InsertedRowsCounter(self.model)
+        with transaction.atomic(), connection.execute_wrapper(counter):
+            self.model.objects.bulk_create(objs, ignore_conflicts=True)
+        return counter.rows
+
+    def write(self, pending, result):
+        try:
+            inserted = self.insert([obj for _, obj in pending])
+        except DatabaseError:
+            for line, obj in pending:
+                try:
+                    inserted = self.insert([obj])
+                except DatabaseError as error:
+                    result.reject(line, error)
+                    continue
+                result.accepted += inserted
+                result.skipped += 1 - inserted
+            return
+        result.accepted += inserted
+        result.skipped += len(pending) - inserted
+
+    def run(self):
+        result = ImportResult(self.path.name)
+        with open(self.path, 'r', encoding='utf-8', newline='') as csvfile:
+            reader = csv.DictReader(csvfile)
+            self.resolve_columns(reader.fieldnames or [])
+            with self.db_lock:
+                self.load_id_maps()
+            rows = enumerate(reader, start=1)
+            while True:
+                chunk = list(islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+                pending = []
+                for line, row in chunk:
+                    try:
+                        pending.append((line, self.build(row)))
+                    except ValidationError as error:
+                        result.reject(line, '; '.join(error.messages))
+                result.rows += len(chunk)
+                if pending:
+                    with self.db_lock:
+                        self.write(pending, result)
+        with self.db_lock:
+            self.reset_sequences()
+        result.finished = time.perf_counter()
+        return result
+
+    def reset_sequences(self):
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [self.model]
+        )
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+
+def dependency_graph(models):
+    """Для каждой модели - модели набора, на которые она ссылается."""
+    return {
+        model: {
+            field.related_model for field in model._meta.concrete_fields
+            if field.many_to_one
+            and field.related_model in models
+            and field.related_model is not model
+        }
+        for model in models
+    }
+
+
+def _run_importer(importer):
+    try:
+        return importer.run()
+    finally:
+        connections.close_all()
+
+
+def import_files(files, workers=DEFAULT_WORKERS,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+    """Загружает файлы {модель: путь} параллельно в порядке зависимостей.
+
+    Файл ставится в очередь пула, как только загружены все файлы моделей,
+    на которые он ссылается. SQLite допускает только одного писателя,
+    поэтому для него обращения к БД сериализуются, а разбор и проверка
+    строк по-прежнему идут параллельно. Возвращает итератор пар
+    (модель, ImportResult или исключение) в порядке завершения.
+    """
+    pending = dependency_graph(set(files))
+    db_lock = threading.Lock() if connection.vendor == 'sqlite' else None
+    done = set()
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for model in [m for m, deps in pending.items() if deps <= done]:
+                del pending[model]
+                importer = CSVImporter(
+                    model, files[model], chunk_size, db_lock
+                )
+                running[executor.submit(_run_importer, importer)] = model
+            if not running:
+                raise ValueError(
+                    'Циклическая зависимость между файлами: '
+                    f'{", ".join(model.__name__ for model in pending)}'
+                )
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                model = running.pop(future)
+                done.add(model)
+                outcome = future.exception() or future.result()
+                observe_import(model, outcome)
+                yield model, outcome
@@ -1,10 +1,15 @@
-from csv import DictReader
 from pathlib import Path
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
-from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from api.caching import BULK_NAMESPACE, bump_version
+from reviews.importer import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_WORKERS, import_files
+)
+from reviews.models import (
+    Category, Comment, Genre, GenreTitle, LeaderboardEntry, Review, Title
+)
 from users.models import ProjectUser
 
 MAPPING_DATA = {
@@ -20,23 +25,49 @@ STATIC_DATA_PATH = Path(settings.BASE_DIR) / 'static/data/'
 
 
 class Command(BaseCommand):
+    help = 'Загружает тестовые данные из CSV-файлов в static/data/.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Количество строк, записываемых одной транзакцией.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_WORKERS,
+            help='Количество файлов, загружаемых одновременно.'
+        )
+
     def handle(self, *args, **options):
-        for model, data in MAPPING_DATA.items():
-            csv_path = STATIC_DATA_PATH / data
-            with open(csv_path, 'r', encoding='utf-8') as csvfile:
-                reader = DictReader(csvfile)
-                for row in reader:
-                    try:
-                        if model == Title:
-                            row['category'] = Category.objects.get(
-                                id=row['category'])
-                        elif model in (Review, Comment):
-                            row['author'] = ProjectUser.objects.get(
-                                id=row['author'])
-                        model.objects.get_or_create(**row)
-                    except (ValueError, KeyError, model.DoesNotExist) as e:
-                        self.stdout.write(self.style.ERROR(
-                            f'Ошибка при загрузке {data}: {e}'
-                        ))
-                self.stdout.write(self.style.SUCCESS(
-                    f'Файл {data} успешно загружен'))
+        files = {
+            model: STATIC_DATA_PATH / data
+            for model, data in MAPPING_DATA.items()
+        }
+        for model, result in import_files(
+            files, options['workers'], options['chunk_size']
+        ):
+            if isinstance(result, Exception):
+                self.stdout.write(self.style.ERROR(
+                    f'Ошибка при загрузке {MAPPING_DATA[model]}: {result}'
+                ))
+                continue
+            self.report(result)
+        # Загрузчик создаёт записи массово, минуя сигналы.
+        LeaderboardEntry.objects.rebuild()
+        bump_version(BULK_NAMESPACE)
+
+    def report(self, result):
+        for error in result.errors:
+            self.stdout.write(self.style.ERROR(
+                f'Ошибка при загрузке {result.name}: {error}'
+            ))
+        style = self.style.WARNING if result.rejected else self.style.SUCCESS
+        self.stdout.write(style(
+            f'Файл {result.name} загружен: {result.accepted} из '
+            f'{result.rows} строк, пропущено существующих '
+            f'{result.skipped}, отклонено {result.rejected}, '
+            f'{result.rows_per_second:.0f} строк/с'
+        ))
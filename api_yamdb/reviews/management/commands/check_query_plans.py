@@ -0,0 +1,107 @@
+import re
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, GenreTitle, Review, Title
+
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'^SCAN (?!.*\bUSING\b)'),
+    'postgresql': re.compile(r'Seq Scan on'),
+}
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет GET-запросы к основным эндпоинтам API, получает EXPLAIN '
+        'для каждого SQL-запроса и отмечает полные сканирования таблиц.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fail',
+            action='store_true',
+            help='Завершиться с ошибкой, если найдены полные сканирования.'
+        )
+
+    def sample_urls(self):
+        review = Review.objects.order_by('-pk').first()
+        comment = Comment.objects.order_by('-pk').first()
+        genre_title = GenreTitle.objects.select_related('genre').first()
+        title = Title.objects.select_related('category').first()
+        urls = [
+            '/api/v1/titles/',
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+        ]
+        if title:
+            urls.append(f'/api/v1/titles/{title.pk}/')
+            filters = [{'year': title.year}, {'name': title.name[:3]}]
+            if title.category:
+                filters.append({'category': title.category.slug})
+            if genre_title and genre_title.genre:
+                filters.append({'genre': genre_title.genre.slug})
+            urls.extend(
+                f'/api/v1/titles/?{urlencode(params)}' for params in filters
+            )
+        if review:
+            urls.append(f'/api/v1/titles/{review.title_id}/reviews/')
+            urls.append(
+                f'/api/v1/titles/{review.title_id}/reviews/{review.pk}/'
+            )
+        if comment:
+            prefix = (
+                f'/api/v1/titles/{comment.review.title_id}/reviews/'
+                f'{comment.review_id}/comments/'
+            )
+            urls.append(prefix)
+            urls.append(f'{prefix}{comment.pk}/')
+        return urls
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(EXPLAIN_PREFIXES[connection.vendor] + sql)
+            rows = cursor.fetchall()
+        if connection.vendor == 'sqlite':
+            return [row[-1] for row in rows]
+        return [row[0] for row in rows]
+
+    def handle(self, *args, **options):
+        if connection.vendor not in FULL_SCAN_PATTERNS:
+            raise CommandError(
+                f'EXPLAIN для {connection.vendor} не поддерживается'
+            )
+        full_scan = FULL_SCAN_PATTERNS[connection.vendor]
+        client = Client()
+        flagged = 0
+        for url in self.sample_urls():
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            self.stdout.write(f'{url} [{response.status_code}]')
+            for query in context.captured_queries:
+                plan = self.explain(query['sql'])
+                scans = [line for line in plan if full_scan.search(line)]
+                if scans:
+                    flagged += 1
+                    self.stdout.write(self.style.WARNING(
+                        f'  Полное сканирование: {"; ".join(scans)}\n'
+                        f'    {query["sql"]}'
+                    ))
+                elif options['verbosity'] > 1:
+                    self.stdout.write(f'  {"; ".join(plan)}')
+        if not flagged:
+            self.stdout.write(self.style.SUCCESS(
+                'Полных сканирований не найдено'
+            ))
+            return
+        message = f'Запросов с полным сканированием: {flagged}'
+        if options['fail']:
+            raise CommandError(message)
+        self.stdout.write(self.style.WARNING(message))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api.caching import BULK_NAMESPACE, bump_version
+from reviews.models import RatingHistogram
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает гистограммы оценок всех произведений одним '
+        'сгруппированным запросом к отзывам.'
+    )
+
+    def handle(self, *args, **options):
+        rebuilt = RatingHistogram.objects.rebuild()
+        bump_version(BULK_NAMESPACE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Гистограммы пересчитаны для {rebuilt} произведений'
+        ))
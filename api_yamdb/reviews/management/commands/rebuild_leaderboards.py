@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api.caching import BULK_NAMESPACE, bump_version
+from reviews.models import LeaderboardEntry
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает общую среднюю оценку и заново строит рейтинги '
+        'произведений.'
+    )
+
+    def handle(self, *args, **options):
+        created = LeaderboardEntry.objects.rebuild()
+        bump_version(BULK_NAMESPACE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинги перестроены, записей: {created}'
+        ))
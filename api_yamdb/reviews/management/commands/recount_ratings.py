@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from api.caching import BULK_NAMESPACE, bump_version
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    help = 'Проверяет и пересчитывает сохранённые рейтинги произведений.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только найти расхождения, не исправляя их.'
+        )
+
+    def handle(self, *args, **options):
+        drifted = Title.objects.annotate(
+            expected_sum=Coalesce(Sum('reviews__score'), 0),
+            expected_count=Count('reviews'),
+        ).filter(
+            ~Q(rating_sum=F('expected_sum'))
+            | ~Q(rating_count=F('expected_count'))
+        ).order_by('pk')
+        drifted = list(drifted)
+        for title in drifted:
+            self.stdout.write(self.style.WARNING(
+                f'{title.name} (id={title.pk}): '
+                f'{title.rating_sum}/{title.rating_count}, '
+                f'ожидалось {title.expected_sum}/{title.expected_count}'
+            ))
+        if options['check']:
+            if drifted:
+                raise CommandError(
+                    f'Рейтинг расходится у {len(drifted)} произведений'
+                )
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+            return
+        updated = Title.objects.refresh_ratings()
+        bump_version(BULK_NAMESPACE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг пересчитан для {updated} произведений, '
+            f'исправлено расхождений: {len(drifted)}'
+        ))
@@ -0,0 +1,253 @@
+from django.db import migrations
+
+# rowid записи индекса: id объекта * 4 + код типа, что позволяет
+# триггерам удалять и обновлять записи по первичному ключу.
+TITLE, REVIEW, COMMENT = 1, 2, 3
+
+SQLITE_FORWARD = (
+    """
+    CREATE VIRTUAL TABLE reviews_search USING fts5(
+        kind UNINDEXED, object_id UNINDEXED, title_id UNINDEXED,
+        review_id UNINDEXED, body,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER reviews_search_title_insert AFTER INSERT ON reviews_title
+    BEGIN
+        INSERT INTO reviews_search
+            (rowid, kind, object_id, title_id, review_id, body)
+        VALUES (new.id * 4 + {TITLE}, 'title', new.id, new.id, NULL,
+                new.name || ' ' || new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER reviews_search_title_update
+    AFTER UPDATE OF name, description ON reviews_title
+    BEGIN
+        DELETE FROM reviews_search WHERE rowid = old.id * 4 + {TITLE};
+        INSERT INTO reviews_search
+            (rowid, kind, object_id, title_id, review_id, body)
+        VALUES (new.id * 4 + {TITLE}, 'title', new.id, new.id, NULL,
+                new.name || ' ' || new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER reviews_search_title_delete AFTER DELETE ON reviews_title
+    BEGIN
+        DELETE FROM reviews_search WHERE rowid = old.id * 4 + {TITLE};
+    END
+    """,
+    f"""
+    CREATE TRIGGER reviews_search_review_insert AFTER INSERT ON reviews_review
+    BEGIN
+        INSERT INTO reviews_search
+            (rowid, kind, object_id, title_id, review_id, body)
+        VALUES (new.id * 4 + {REVIEW}, 'review', new.id, new.title_id,
+                new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER reviews_search_review_update
+    AFTER UPDATE OF text, title_id ON reviews_review
+    BEGIN
+        DELETE FROM reviews_search WHERE rowid = old.id * 4 + {REVIEW};
+        INSERT INTO reviews_search
+            (rowid, kind, object_id, title_id, review_id, body)
+        VALUES (new.id * 4 + {REVIEW}, 'review', new.id, new.title_id,
+                new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER reviews_search_review_delete AFTER DELETE ON reviews_review
+    BEGIN
+        DELETE FROM reviews_search WHERE rowid = old.id * 4 + {REVIEW};
+    END
+    """,
+    f"""
+    CREATE TRIGGER reviews_search_comment_insert
+    AFTER INSERT ON reviews_comment
+    BEGIN
+        INSERT INTO reviews_search
+            (rowid, kind, object_id, title_id, review_id, body)
+        VALUES (new.id * 4 + {COMMENT}, 'comment', new.id,
+                (SELECT title_id FROM reviews_review
+                 WHERE id = new.review_id),
+                new.review_id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER reviews_search_comment_update
+    AFTER UPDATE OF text, review_id ON reviews_comment
+    BEGIN
+        DELETE FROM reviews_search WHERE rowid = old.id * 4 + {COMMENT};
+        INSERT INTO reviews_search
+            (rowid, kind, object_id, title_id, review_id, body)
+        VALUES (new.id * 4 + {COMMENT}, 'comment', new.id,
+                (SELECT title_id FROM reviews_review
+                 WHERE id = new.review_id),
+                new.review_id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER reviews_search_comment_delete
+    AFTER DELETE ON reviews_comment
+    BEGIN
+        DELETE FROM reviews_search WHERE rowid = old.id * 4 + {COMMENT};
+    END
+    """,
+    f"""
+    INSERT INTO reviews_search
+        (rowid, kind, object_id, title_id, review_id, body)
+    SELECT id * 4 + {TITLE}, 'title', id, id, NULL,
+           name || ' ' || description
+    FROM reviews_title
+    """,
+    f"""
+    INSERT INTO reviews_search
+        (rowid, kind, object_id, title_id, review_id, body)
+    SELECT id * 4 + {REVIEW}, 'review', id, title_id, id, text
+    FROM reviews_review
+    """,
+    f"""
+    INSERT INTO reviews_search
+        (rowid, kind, object_id, title_id, review_id, body)
+    SELECT comment.id * 4 + {COMMENT}, 'comment', comment.id,
+           review.title_id, comment.review_id, comment.text
+    FROM reviews_comment AS comment
+    JOIN reviews_review AS review ON review.id = comment.review_id
+    """,
+)
+SQLITE_BACKWARD = (
+    'DROP TRIGGER IF EXISTS reviews_search_title_insert',
+    'DROP TRIGGER IF EXISTS reviews_search_title_update',
+    'DROP TRIGGER IF EXISTS reviews_search_title_delete',
+    'DROP TRIGGER IF EXISTS reviews_search_review_insert',
+    'DROP TRIGGER IF EXISTS reviews_search_review_update',
+    'DROP TRIGGER IF EXISTS reviews_search_review_delete',
+    'DROP TRIGGER IF EXISTS reviews_search_comment_insert',
+    'DROP TRIGGER IF EXISTS reviews_search_comment_update',
+    'DROP TRIGGER IF EXISTS reviews_search_comment_delete',
+    'DROP TABLE IF EXISTS reviews_search',
+)
+
+POSTGRESQL_FORWARD = (
+    """
+    CREATE TABLE reviews_search (
+        id bigint PRIMARY KEY,
+        kind varchar(16) NOT NULL,
+        object_id bigint NOT NULL,
+        title_id bigint,
+        review_id bigint,
+        body text NOT NULL,
+        document tsvector GENERATED ALWAYS AS
+            (to_tsvector('russian', body)) STORED
+    )
+    """,
+    'CREATE INDEX reviews_search_document_idx '
+    'ON reviews_search USING GIN (document)',
+    f"""
+    CREATE FUNCTION reviews_search_sync() RETURNS trigger AS $$
+    DECLARE
+        source record;
+        code integer;
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            source := OLD;
+        ELSE
+            source := NEW;
+        END IF;
+        code := CASE TG_TABLE_NAME
+            WHEN 'reviews_title' THEN {TITLE}
+            WHEN 'reviews_review' THEN {REVIEW}
+            ELSE {COMMENT}
+        END;
+        DELETE FROM reviews_search WHERE id = source.id * 4 + code;
+        IF TG_OP = 'DELETE' THEN
+            RETURN NULL;
+        END IF;
+        IF TG_TABLE_NAME = 'reviews_title' THEN
+            INSERT INTO reviews_search VALUES (
+                NEW.id * 4 + code, 'title', NEW.id, NEW.id, NULL,
+                NEW.name || ' ' || NEW.description
+            );
+        ELSIF TG_TABLE_NAME = 'reviews_review' THEN
+            INSERT INTO reviews_search VALUES (
+                NEW.id * 4 + code, 'review', NEW.id, NEW.title_id, NEW.id,
+                NEW.text
+            );
+        ELSE
+            INSERT INTO reviews_search VALUES (
+                NEW.id * 4 + code, 'comment', NEW.id,
+                (SELECT title_id FROM reviews_review
+                 WHERE id = NEW.review_id),
+                NEW.review_id, NEW.text
+            );
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    'CREATE TRIGGER reviews_search_title AFTER INSERT OR DELETE '
+    'OR UPDATE OF name, description ON reviews_title '
+    'FOR EACH ROW EXECUTE FUNCTION reviews_search_sync()',
+    'CREATE TRIGGER reviews_search_review AFTER INSERT OR DELETE '
+    'OR UPDATE OF text, title_id ON reviews_review '
+    'FOR EACH ROW EXECUTE FUNCTION reviews_search_sync()',
+    'CREATE TRIGGER reviews_search_comment AFTER INSERT OR DELETE '
+    'OR UPDATE OF text, review_id ON reviews_comment '
+    'FOR EACH ROW EXECUTE FUNCTION reviews_search_sync()',
+    f"""
+    INSERT INTO reviews_search
+    SELECT id * 4 + {TITLE}, 'title', id, id, NULL,
+           name || ' ' || description
+    FROM reviews_title
+    UNION ALL
+    SELECT id * 4 + {REVIEW}, 'review', id, title_id, id, text
+    FROM reviews_review
+    UNION ALL
+    SELECT comment.id * 4 + {COMMENT}, 'comment', comment.id,
+           review.title_id, comment.review_id, comment.text
+    FROM reviews_comment AS comment
+    JOIN reviews_review AS review ON review.id = comment.review_id
+    """,
+)
+POSTGRESQL_BACKWARD = (
+    'DROP TRIGGER IF EXISTS reviews_search_title ON reviews_title',
+    'DROP TRIGGER IF EXISTS reviews_search_review ON reviews_review',
+    'DROP TRIGGER IF EXISTS reviews_search_comment ON reviews_comment',
+    'DROP FUNCTION IF EXISTS reviews_search_sync()',
+    'DROP TABLE IF EXISTS reviews_search',
+)
+
+STATEMENTS = {
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+    'postgresql': (POSTGRESQL_FORWARD, POSTGRESQL_BACKWARD),
+}
+
+
+def run_statements(schema_editor, direction):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for sql in statements[direction]:
+        schema_editor.execute(sql, params=None)
+
+
+def create_search_index(apps, schema_editor):
+    run_statements(schema_editor, 0)
+
+
+def drop_search_index(apps, schema_editor):
+    run_statements(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 3.2 on 2026-10-18 19:46
+
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+
+# Значения на момент создания миграции, чтобы её повторный прогон не
+# зависел от текущих настроек; пересчитать рейтинги с актуальными
+# настройками можно командой rebuild_leaderboards.
+MIN_VOTES = 10
+DEFAULT_PRIOR = 5.5
+
+
+def fill_leaderboards(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    LeaderboardEntry = apps.get_model('reviews', 'LeaderboardEntry')
+    totals = Title.objects.aggregate(
+        total=Sum('rating_sum'), count=Sum('rating_count')
+    )
+    prior = (
+        totals['total'] / totals['count'] if totals['count']
+        else DEFAULT_PRIOR
+    )
+    min_votes = MIN_VOTES
+    scores = {}
+    entries = []
+    for title_id, category_id, year, total, count in Title.objects.values_list(
+        'id', 'category_id', 'year', 'rating_sum', 'rating_count'
+    ):
+        score = (
+            (total + min_votes * prior) / (count + min_votes) if count
+            else None
+        )
+        scores[title_id] = score
+        entries.append(LeaderboardEntry(
+            board='global', key=0, title_id=title_id, score=score
+        ))
+        entries.append(LeaderboardEntry(
+            board='year', key=year, title_id=title_id, score=score
+        ))
+        if category_id is not None:
+            entries.append(LeaderboardEntry(
+                board='category', key=category_id, title_id=title_id,
+                score=score
+            ))
+    for title_id, genre_id in GenreTitle.objects.filter(
+        genre__isnull=False
+    ).values_list('title_id', 'genre_id'):
+        entries.append(LeaderboardEntry(
+            board='genre', key=genre_id, title_id=title_id,
+            score=scores[title_id]
+        ))
+    LeaderboardEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_ratinghistogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('global', 'Все произведения'), ('genre', 'Жанр'), ('category', 'Категория'), ('year', 'Год')], max_length=16, verbose_name='Рейтинг')),
+                ('key', models.IntegerField(default=0, verbose_name='Жанр, категория или год')),
+                ('score', models.FloatField(null=True, verbose_name='Взвешенный рейтинг')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Места в рейтингах',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leaderboardentry',
+            index=models.Index(fields=['board', 'key', '-score', 'title'], name='leaderboard_rank_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('board', 'key', 'title'), name='unique_leaderboard_title'),
+        ),
+        migrations.RunPython(fill_leaderboards, migrations.RunPython.noop),
+    ]
@@ -1,13 +1,23 @@
-from django.db import models
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, models, transaction
+from django.db.models import (
+    Avg, Case, Count, ExpressionWrapper, F, FloatField, OuterRef, Subquery,
+    Sum, Value, When
+)
+from django.db.models.functions import Cast, Coalesce, NullIf
 from django.core.validators import MaxValueValidator, MinValueValidator
 
-from api_yamdb.constants import LIMIT_NAME_TEXT, MAX_SCOPE_VALUE, MIN_VALUE
+from api.caching import bump_version_on_commit
+from api_yamdb.constants import (
+    LEADERBOARD_BOARD_MAX_LENGTH, LIMIT_NAME_TEXT, MAX_SCOPE_VALUE, MIN_VALUE
+)
 from users.models import ProjectUser
 from reviews.utilites import current_year
 
 
 class AbstractModelCategoryGenre(models.Model):
-    name = models.CharField('Имя', max_length=LIMIT_NAME_TEXT)
+    name = models.CharField('Имя', max_length=LIMIT_NAME_TEXT, db_index=True)
     slug = models.SlugField(
         'Slug', unique=True)
 
@@ -47,6 +57,43 @@ class Genre(AbstractModelCategoryGenre):
         verbose_name_plural = 'Жанры'
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def shift_rating(self, score_delta, count_delta):
+        """Сдвигает сохранённые сумму и количество оценок без агрегации."""
+        rating_sum = F('rating_sum') + score_delta
+        rating_count = F('rating_count') + count_delta
+        return self.update(
+            rating_sum=rating_sum,
+            rating_count=rating_count,
+            rating=ExpressionWrapper(
+                Cast(rating_sum, FloatField()) / NullIf(rating_count, 0),
+                output_field=FloatField()
+            )
+        )
+
+    def refresh_ratings(self):
+        """Пересчитывает рейтинг по отзывам одним UPDATE."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0,
+                output_field=models.PositiveIntegerField()
+            ),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('id')).values('total')),
+                0,
+                output_field=models.PositiveIntegerField()
+            ),
+            rating=Subquery(
+                reviews.annotate(average=Avg('score')).values('average')
+            )
+        )
+
+
 class Title(models.Model):
     name = models.CharField(
         'Название произведения',
@@ -54,7 +101,6 @@ class Title(models.Model):
     )
     year = models.SmallIntegerField(
         'Год выпуска',
-        db_index=True,
         validators=[
             MaxValueValidator(
                 limit_value=current_year,
@@ -75,16 +121,51 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         null=True,
     )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок',
+        default=0,
+        editable=False
+    )
+    rating = models.FloatField(
+        'Рейтинг',
+        null=True,
+        editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('name',)
         default_related_name = 'titles'
+        indexes = (
+            models.Index(fields=('name', 'id'), name='title_name_idx'),
+            models.Index(
+                fields=('category', 'name'), name='title_category_name_idx'
+            ),
+            models.Index(fields=('year', 'name'), name='title_year_name_idx'),
+            models.Index(fields=('year', 'id'), name='title_year_idx'),
+            models.Index(fields=('rating', 'id'), name='title_rating_idx'),
+            models.Index(
+                fields=('rating_count', 'id'), name='title_rating_count_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
 
 class GenreTitle(models.Model):
     genre = models.ForeignKey(
@@ -104,11 +185,54 @@ class GenreTitle(models.Model):
                 name='unique_genre_title',
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('title', 'genre'), name='genretitle_title_genre_idx'
+            ),
+        )
 
     def __str__(self):
         return f'{self.title} {self.genre}'
 
 
+class ReviewQuerySet(models.QuerySet):
+    """Массовые операции, поддерживающие рейтинг и гистограммы оценок
+    произведений и сбрасывающие закешированные ответы."""
+
+    @staticmethod
+    def refresh_titles(title_ids):
+        Title.objects.filter(pk__in=title_ids).refresh_ratings()
+        RatingHistogram.objects.rebuild(title_ids)
+        LeaderboardEntry.objects.refresh_scores(title_ids)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        title_ids = {obj.title_id for obj in objs}
+        self.refresh_titles(title_ids)
+        bump_version_on_commit(
+            'title', *(f'review:{title_id}' for title_id in title_ids)
+        )
+        return objs
+
+    def update(self, **kwargs):
+        title_ids = set(self.values_list('title_id', flat=True))
+        rows = super().update(**kwargs)
+        namespaces = [f'review:{title_id}' for title_id in title_ids]
+        if {'score', 'title', 'title_id'} & kwargs.keys():
+            new_title = kwargs.get('title', kwargs.get('title_id'))
+            if new_title is not None:
+                new_title = getattr(new_title, 'pk', new_title)
+                title_ids.add(new_title)
+                namespaces.append(f'review:{new_title}')
+            self.refresh_titles(title_ids)
+            # Рейтинг выводится вместе с произведением.
+            namespaces.append('title')
+        bump_version_on_commit(*namespaces)
+        return rows
+
+    update.alters_data = True
+
+
 class Review(AbstractModelReviewComment):
     title = models.ForeignKey(
         Title,
@@ -130,6 +254,8 @@ class Review(AbstractModelReviewComment):
         ]
     )
 
+    objects = ReviewQuerySet.as_manager()
+
     class Meta(AbstractModelReviewComment.Meta):
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
@@ -140,6 +266,18 @@ class Review(AbstractModelReviewComment):
                 name='unique_author_title'
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
 
 
 class Comment(AbstractModelReviewComment):
@@ -152,3 +290,269 @@ class Comment(AbstractModelReviewComment):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         default_related_name = 'comments'
+        indexes = (
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+        )
+
+
+SCORES = range(MIN_VALUE, MAX_SCOPE_VALUE + 1)
+SCORE_FIELDS = tuple(f'score_{score}' for score in SCORES)
+
+
+class RatingHistogramQuerySet(models.QuerySet):
+
+    def shift(self, title_id, score, delta):
+        """Сдвигает счётчик оценки score без чтения строки; строка
+        создаётся при первой оценке произведения."""
+        field = f'score_{score}'
+        histogram = self.filter(title_id=title_id)
+        if delta < 0:
+            histogram.filter(**{f'{field}__gte': -delta}).update(
+                **{field: F(field) + delta}
+            )
+            return
+        if histogram.update(**{field: F(field) + delta}):
+            return
+        try:
+            with transaction.atomic():
+                self.create(title_id=title_id, **{field: delta})
+        except IntegrityError:
+            # Строку успел создать параллельный запрос.
+            histogram.update(**{field: F(field) + delta})
+
+    def rebuild(self, title_ids=None):
+        """Пересчитывает гистограммы по отзывам одним сгруппированным
+        запросом; без title_ids - для всех произведений."""
+        reviews = Review.objects.order_by()
+        histograms = self.all()
+        if title_ids is not None:
+            reviews = reviews.filter(title_id__in=title_ids)
+            histograms = histograms.filter(title_id__in=title_ids)
+        counters = {}
+        for title_id, score, count in reviews.values_list(
+            'title_id', 'score'
+        ).annotate(count=Count('id')):
+            counters.setdefault(title_id, {})[f'score_{score}'] = count
+        with transaction.atomic():
+            histograms.delete()
+            self.bulk_create(
+                RatingHistogram(title_id=title_id, **fields)
+                for title_id, fields in counters.items()
+            )
+        return len(counters)
+
+
+class RatingHistogram(models.Model):
+    """Число оценок каждого значения от 1 до 10 для произведения."""
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='histogram',
+        verbose_name='Произведение'
+    )
+    score_1 = models.PositiveIntegerField('Оценок 1', default=0)
+    score_2 = models.PositiveIntegerField('Оценок 2', default=0)
+    score_3 = models.PositiveIntegerField('Оценок 3', default=0)
+    score_4 = models.PositiveIntegerField('Оценок 4', default=0)
+    score_5 = models.PositiveIntegerField('Оценок 5', default=0)
+    score_6 = models.PositiveIntegerField('Оценок 6', default=0)
+    score_7 = models.PositiveIntegerField('Оценок 7', default=0)
+    score_8 = models.PositiveIntegerField('Оценок 8', default=0)
+    score_9 = models.PositiveIntegerField('Оценок 9', default=0)
+    score_10 = models.PositiveIntegerField('Оценок 10', default=0)
+
+    objects = RatingHistogramQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Гистограмма оценок'
+        verbose_name_plural = 'Гистограммы оценок'
+
+    def __str__(self):
+        return f'{self.title_id}: {self.counts()}'
+
+    def counts(self):
+        return {
+            score: getattr(self, field)
+            for score, field in zip(SCORES, SCORE_FIELDS)
+        }
+
+    @staticmethod
+    def summary(counts):
+        """Число, среднее и медиана оценок по счётчикам {оценка: число}."""
+        total = sum(counts.values())
+        if not total:
+            return {'count': 0, 'mean': None, 'median': None}
+        mean = sum(score * count for score, count in counts.items()) / total
+        middle = []
+        seen = 0
+        for score in sorted(counts):
+            seen += counts[score]
+            # Позиции (total - 1) // 2 и total // 2 в упорядоченных оценках.
+            while len(middle) < 2 and seen > (total - 1 + len(middle)) // 2:
+                middle.append(score)
+        return {
+            'count': total,
+            'mean': round(mean, 2),
+            'median': sum(middle) / 2,
+        }
+
+
+PRIOR_CACHE_KEY = 'leaderboard:prior'
+
+
+def get_prior_rating(refresh=False):
+    """Средняя оценка по всем отзывам - априорное значение взвешенного
+    рейтинга.
+
+    Хранится в кеше и пересчитывается при полной перестройке рейтингов,
+    поэтому отдельный отзыв не требует агрегации по всем произведениям.
+    """
+    prior = None if refresh else cache.get(PRIOR_CACHE_KEY)
+    if prior is None:
+        totals = Title.objects.aggregate(
+            total=Sum('rating_sum'), count=Sum('rating_count')
+        )
+        prior = (
+            totals['total'] / totals['count'] if totals['count']
+            else (MIN_VALUE + MAX_SCOPE_VALUE) / 2
+        )
+        cache.set(PRIOR_CACHE_KEY, prior, None)
+    return prior
+
+
+def weighted_rating(prior):
+    """Байесовский рейтинг произведения: средняя оценка, к которой
+    добавлено LEADERBOARD_MIN_VOTES оценок, равных prior.
+
+    Произведения с несколькими отзывами остаются близко к общему
+    среднему и не вытесняют хорошо оценённые. Без отзывов - NULL.
+    """
+    min_votes = settings.LEADERBOARD_MIN_VOTES
+    return Case(
+        When(rating_count=0, then=Value(None)),
+        default=ExpressionWrapper(
+            (Cast(F('rating_sum'), FloatField()) + min_votes * prior)
+            / (F('rating_count') + min_votes),
+            output_field=FloatField()
+        ),
+        output_field=FloatField()
+    )
+
+
+class LeaderboardQuerySet(models.QuerySet):
+
+    def refresh_scores(self, title_ids):
+        """Пересчитывает взвешенный рейтинг в записях произведений одним
+        UPDATE."""
+        return self.filter(title_id__in=title_ids).update(
+            score=Subquery(
+                Title.objects.filter(pk=OuterRef('title_id')).annotate(
+                    weighted=weighted_rating(get_prior_rating())
+                ).values('weighted')[:1]
+            )
+        )
+
+    def sync_titles(self, title_ids=None, boards=None):
+        """Заново создаёт записи произведений в рейтингах boards (по
+        умолчанию во всех); без title_ids - для всех произведений."""
+        boards = set(boards or dict(LeaderboardEntry.BOARDS))
+        titles = Title.objects.order_by()
+        entries = self.filter(board__in=boards)
+        links = GenreTitle.objects.filter(genre__isnull=False)
+        if title_ids is not None:
+            titles = titles.filter(pk__in=title_ids)
+            entries = entries.filter(title_id__in=title_ids)
+            links = links.filter(title_id__in=title_ids)
+        scores = {}
+        new_entries = []
+        for title_id, category_id, year, score in titles.annotate(
+            weighted=weighted_rating(get_prior_rating())
+        ).values_list('id', 'category_id', 'year', 'weighted'):
+            scores[title_id] = score
+            for board, key in ((LeaderboardEntry.GLOBAL, 0),
+                               (LeaderboardEntry.YEAR, year),
+                               (LeaderboardEntry.CATEGORY, category_id)):
+                if board in boards and key is not None:
+                    new_entries.append(LeaderboardEntry(
+                        board=board, key=key, title_id=title_id,
+                        score=score
+                    ))
+        if LeaderboardEntry.GENRE in boards:
+            for title_id, genre_id in links.values_list(
+                'title_id', 'genre_id'
+            ):
+                new_entries.append(LeaderboardEntry(
+                    board=LeaderboardEntry.GENRE, key=genre_id,
+                    title_id=title_id, score=scores[title_id]
+                ))
+        with transaction.atomic():
+            entries.delete()
+            self.bulk_create(new_entries)
+        return len(new_entries)
+
+    def rebuild(self):
+        """Пересчитывает общее среднее и все рейтинги."""
+        get_prior_rating(refresh=True)
+        return self.sync_titles()
+
+
+class LeaderboardEntry(models.Model):
+    """Произведение в одном из заранее построенных рейтингов.
+
+    Рейтинг задаётся парой (board, key): key - id жанра или категории
+    или год, для общего рейтинга 0. Страница рейтинга читается по
+    индексу без сортировки всех произведений.
+    """
+
+    GLOBAL = 'global'
+    GENRE = 'genre'
+    CATEGORY = 'category'
+    YEAR = 'year'
+    BOARDS = (
+        (GLOBAL, 'Все произведения'),
+        (GENRE, 'Жанр'),
+        (CATEGORY, 'Категория'),
+        (YEAR, 'Год'),
+    )
+    # Рейтинги, состав которых зависит только от полей произведения.
+    TITLE_BOARDS = (GLOBAL, CATEGORY, YEAR)
+
+    board = models.CharField(
+        'Рейтинг',
+        choices=BOARDS,
+        max_length=LEADERBOARD_BOARD_MAX_LENGTH
+    )
+    key = models.IntegerField('Жанр, категория или год', default=0)
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='leaderboard_entries',
+        verbose_name='Произведение'
+    )
+    score = models.FloatField('Взвешенный рейтинг', null=True)
+
+    objects = LeaderboardQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтингах'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('board', 'key', 'title'),
+                name='unique_leaderboard_title',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('board', 'key', '-score', 'title'),
+                name='leaderboard_rank_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.board}:{self.key} {self.title_id} {self.score}'
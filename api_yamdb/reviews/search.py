@@ -0,0 +1,140 @@
+import re
+from html import escape
+
+from django.db import connection
+
+from api_yamdb.constants import (
+    SEARCH_HIGHLIGHT_END, SEARCH_HIGHLIGHT_START, SEARCH_MARK_END,
+    SEARCH_MARK_START, SEARCH_SNIPPET_WORDS
+)
+
+SEARCH_KINDS = ('title', 'review', 'comment')
+WORD = re.compile(r'\w+')
+
+SQLITE_WHERE = 'reviews_search MATCH %s'
+SQLITE_SELECT = f"""
+    SELECT kind, object_id, title_id, review_id,
+           snippet(reviews_search, 4, '{SEARCH_MARK_START}',
+                   '{SEARCH_MARK_END}', '…', {SEARCH_SNIPPET_WORDS}),
+           -bm25(reviews_search)
+    FROM reviews_search
+    WHERE {{where}}
+    ORDER BY rank
+    LIMIT %s OFFSET %s
+"""
+SQLITE_COUNT = 'SELECT COUNT(*) FROM reviews_search WHERE {where}'
+
+POSTGRESQL_WHERE = "document @@ websearch_to_tsquery('russian', %s)"
+POSTGRESQL_SELECT = f"""
+    SELECT kind, object_id, title_id, review_id,
+           ts_headline(
+               'russian', body, websearch_to_tsquery('russian', %s),
+               'StartSel={SEARCH_MARK_START}, '
+               'StopSel={SEARCH_MARK_END}, '
+               'MaxWords={SEARCH_SNIPPET_WORDS}, MinWords=5'
+           ),
+           ts_rank(document, websearch_to_tsquery('russian', %s))
+    FROM reviews_search
+    WHERE {{where}}
+    ORDER BY 6 DESC, id
+    LIMIT %s OFFSET %s
+"""
+POSTGRESQL_COUNT = 'SELECT COUNT(*) FROM reviews_search WHERE {where}'
+
+
+def highlight(snippet):
+    """Экранирует HTML в тексте фрагмента и выделяет совпадения тегами.
+
+    Текст отзывов и комментариев не проверяется на разметку, поэтому
+    выделение, добавленное СУБД вокруг неэкранированного текста, открыло
+    бы дорогу XSS у клиентов, выводящих фрагмент как HTML. Метки
+    совпадений, оказавшиеся в самом тексте, дают лишь лишние <b>.
+    """
+    return escape(snippet).replace(
+        SEARCH_MARK_START, SEARCH_HIGHLIGHT_START
+    ).replace(SEARCH_MARK_END, SEARCH_HIGHLIGHT_END)
+
+
+def sqlite_match_expression(query):
+    """Превращает ввод пользователя в безопасный запрос FTS5.
+
+    Каждое слово берётся в кавычки и ищется по префиксу, слова
+    объединяются через AND; операторы FTS5 из ввода не используются.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(query))
+
+
+class SearchResults:
+    """Ленивый результат полнотекстового поиска.
+
+    Поддерживает count() и срезы, поэтому может передаваться в
+    стандартный пагинатор: на каждую страницу выполняется один запрос
+    за страницей результатов и один - за их общим числом.
+    """
+
+    def __init__(self, query, kinds=SEARCH_KINDS):
+        self.query = query
+        self.kinds = tuple(kinds)
+        self.vendor = connection.vendor
+        if self.vendor == 'sqlite':
+            self.term = sqlite_match_expression(query)
+        elif self.vendor == 'postgresql':
+            self.term = query.strip()
+        else:
+            raise NotImplementedError(
+                f'Полнотекстовый поиск не поддерживается для {self.vendor}'
+            )
+        self._count = None
+
+    def _where(self):
+        where = SQLITE_WHERE if self.vendor == 'sqlite' else POSTGRESQL_WHERE
+        params = [self.term]
+        if set(self.kinds) != set(SEARCH_KINDS):
+            where += f' AND kind IN ({", ".join(["%s"] * len(self.kinds))})'
+            params.extend(self.kinds)
+        return where, params
+
+    def count(self):
+        if self._count is None:
+            if not self.term or not self.kinds:
+                self._count = 0
+                return self._count
+            where, params = self._where()
+            sql = (
+                SQLITE_COUNT if self.vendor == 'sqlite' else POSTGRESQL_COUNT
+            ).format(where=where)
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError('Поддерживаются только срезы')
+        start = key.start or 0
+        limit = (key.stop if key.stop is not None else self.count()) - start
+        if not self.term or not self.kinds or limit <= 0:
+            return []
+        where, params = self._where()
+        if self.vendor == 'sqlite':
+            sql = SQLITE_SELECT.format(where=where)
+        else:
+            sql = POSTGRESQL_SELECT.format(where=where)
+            params = [self.term, self.term, *params]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*params, limit, start])
+            rows = cursor.fetchall()
+        return [
+            {
+                'type': kind,
+                'id': object_id,
+                'title_id': title_id,
+                'review_id': review_id,
+                'snippet': highlight(snippet),
+                'rank': rank,
+            }
+            for kind, object_id, title_id, review_id, snippet, rank in rows
+        ]
@@ -0,0 +1,103 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import (
+    Category, Genre, LeaderboardEntry, RatingHistogram, Review, Title
+)
+
+# Поля произведения, от которых зависит его место в рейтингах.
+LEADERBOARD_TITLE_FIELDS = ('category_id', 'year')
+
+
+def move_score(old_title_id, old_score, review):
+    RatingHistogram.objects.shift(old_title_id, old_score, -1)
+    RatingHistogram.objects.shift(review.title_id, review.score, 1)
+    LeaderboardEntry.objects.refresh_scores({old_title_id, review.title_id})
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    if created:
+        Title.objects.filter(pk=instance.title_id).shift_rating(
+            instance.score, 1
+        )
+        RatingHistogram.objects.shift(instance.title_id, instance.score, 1)
+        LeaderboardEntry.objects.refresh_scores([instance.title_id])
+    else:
+        loaded = getattr(instance, '_loaded_values', {})
+        old_title_id = loaded.get('title_id')
+        old_score = loaded.get('score')
+        if old_title_id is None or old_score is None:
+            Title.objects.filter(pk=instance.title_id).refresh_ratings()
+            RatingHistogram.objects.rebuild([instance.title_id])
+            LeaderboardEntry.objects.refresh_scores([instance.title_id])
+        elif old_title_id != instance.title_id:
+            Title.objects.filter(pk=old_title_id).shift_rating(-old_score, -1)
+            Title.objects.filter(pk=instance.title_id).shift_rating(
+                instance.score, 1
+            )
+            move_score(old_title_id, old_score, instance)
+        elif old_score != instance.score:
+            Title.objects.filter(pk=instance.title_id).shift_rating(
+                instance.score - old_score, 0
+            )
+            move_score(old_title_id, old_score, instance)
+    instance._loaded_values = {
+        'title_id': instance.title_id, 'score': instance.score
+    }
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    Title.objects.filter(pk=instance.title_id).shift_rating(
+        -instance.score, -1
+    )
+    RatingHistogram.objects.shift(instance.title_id, instance.score, -1)
+    LeaderboardEntry.objects.refresh_scores([instance.title_id])
+
+
+@receiver(post_save, sender=Title)
+def update_title_leaderboards(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    if created or any(
+        field not in loaded or loaded[field] != getattr(instance, field)
+        for field in LEADERBOARD_TITLE_FIELDS
+    ):
+        LeaderboardEntry.objects.sync_titles(
+            [instance.pk], LeaderboardEntry.TITLE_BOARDS
+        )
+    else:
+        LeaderboardEntry.objects.refresh_scores([instance.pk])
+    instance._loaded_values = {
+        field: getattr(instance, field)
+        for field in LEADERBOARD_TITLE_FIELDS
+    }
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def update_genre_leaderboards(sender, instance, action, reverse, pk_set,
+                              **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        LeaderboardEntry.objects.sync_titles(
+            [instance.pk], [LeaderboardEntry.GENRE]
+        )
+    elif pk_set:
+        LeaderboardEntry.objects.sync_titles(
+            pk_set, [LeaderboardEntry.GENRE]
+        )
+    else:
+        LeaderboardEntry.objects.filter(
+            board=LeaderboardEntry.GENRE, key=instance.pk
+        ).delete()
+
+
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+def delete_leaderboard(sender, instance, **kwargs):
+    board = (
+        LeaderboardEntry.GENRE if sender is Genre
+        else LeaderboardEntry.CATEGORY
+    )
+    LeaderboardEntry.objects.filter(board=board, key=instance.pk).delete()
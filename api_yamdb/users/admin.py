@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from .models import ProjectUser
+from .models import OutboxMessage, ProjectUser
 from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
 
 
@@ -21,6 +21,16 @@ class UserAdmin(BaseUserAdmin):
     list_filter = ('role', 'username',)
 
 
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = (
+        'recipient', 'subject', 'status', 'attempts', 'created_at',
+        'sent_at'
+    )
+    list_filter = ('status',)
+    search_fields = ('recipient',)
+
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'slug')
@@ -60,6 +70,7 @@ class TitleAdmin(admin.ModelAdmin):
         'year',
         'category',
         'genres',
+        'rating',
     )
     list_editable = ('year', 'category')
     filter_horizontal = ('genre',)
@@ -0,0 +1,21 @@
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from users.tokens import VERSION_CLAIM, ClaimsUser, token_versions
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """Аутентификация по JWT без запроса к таблице пользователей.
+
+    Роль и версия пользователя берутся из claims токена, версия
+    сверяется с кешем отзыва. Токены без версии, выпущенные раньше,
+    по-прежнему проверяются по базе.
+    """
+
+    def get_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        user = ClaimsUser(validated_token)
+        if token_versions.is_revoked(user.id, user.version):
+            raise AuthenticationFailed('Токен отозван', code='token_revoked')
+        return user
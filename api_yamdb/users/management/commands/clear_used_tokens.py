@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.models import UsedRefreshToken
+
+
+class Command(BaseCommand):
+    help = 'Удаляет из чёрного списка refresh-токены с истёкшим сроком.'
+
+    def handle(self, *args, **options):
+        deleted = UsedRefreshToken.objects.delete_expired()
+        self.stdout.write(f'Удалено записей: {deleted}')
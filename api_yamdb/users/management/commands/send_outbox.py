@@ -0,0 +1,86 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import outbox_metrics, process_batch
+
+DEFAULT_WORKERS = 4
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_INTERVAL = 1.0
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди: несколько потоков забирают пачки '
+        'писем и отправляют каждую через одно соединение с сервером.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_WORKERS,
+            help='Число потоков отправки.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Сколько писем отправлять через одно соединение.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=DEFAULT_INTERVAL,
+            help='Пауза в секундах, если в очереди нет готовых писем.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать готовые письма и завершиться.'
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Только вывести состояние очереди.'
+        )
+
+    def report_metrics(self):
+        metrics = outbox_metrics()
+        self.stdout.write(
+            f'В очереди: {metrics["pending"]} (старейшее ждёт '
+            f'{metrics["oldest_pending_seconds"]:.1f} с), '
+            f'не доставлено: {metrics["failed"]}'
+        )
+        if metrics['sent_recently']:
+            self.stdout.write(
+                f'Отправлено за час: {metrics["sent_recently"]}, задержка '
+                f'средняя {metrics["latency_avg"]:.1f} с, '
+                f'максимальная {metrics["latency_max"]:.1f} с'
+            )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.report_metrics()
+            return
+        workers = options['workers']
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                while True:
+                    results = list(executor.map(
+                        process_batch, [options['batch_size']] * workers
+                    ))
+                    sent = sum(result[0] for result in results)
+                    failed = sum(result[1] for result in results)
+                    if sent or failed:
+                        self.stdout.write(
+                            f'Отправлено: {sent}, ошибок: {failed}'
+                        )
+                    elif options['once']:
+                        break
+                    else:
+                        time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                pass
+        self.report_metrics()
@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-18 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsedRefreshToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=255, unique=True, verbose_name='Идентификатор токена')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Срок действия токена')),
+            ],
+            options={
+                'verbose_name': 'Использованный refresh-токен',
+                'verbose_name_plural': 'Использованные refresh-токены',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 20:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_usedrefreshtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='claim_token',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True, verbose_name='Метка забравшего воркера'),
+        ),
+    ]
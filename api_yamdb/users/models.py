@@ -1,11 +1,17 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
-from api_yamdb.constants import (ADMIN, EMAIL_MAX_LENGTH,
-                                 MODERATOR, ROLE_MAX_LENGTH, USER, USER_ROLE,
-                                 USERNAME_MAX_LENGTH)
+from api_yamdb.constants import (ADMIN, EMAIL_MAX_LENGTH, JTI_MAX_LENGTH,
+                                 MODERATOR, OUTBOX_STATUS_MAX_LENGTH,
+                                 OUTBOX_SUBJECT_MAX_LENGTH, ROLE_MAX_LENGTH,
+                                 USER, USER_ROLE, USERNAME_MAX_LENGTH)
 from .validators import validate_username
 
+TOKEN_VERSION_FIELDS = ('role', 'is_active', 'is_superuser')
+# Имя выводится в отзывах и комментариях, его смена сбрасывает их ETag.
+TRACKED_FIELDS = (*TOKEN_VERSION_FIELDS, 'username')
+
 
 class ProjectUser(AbstractUser):
     username = models.CharField(
@@ -29,6 +35,11 @@ class ProjectUser(AbstractUser):
         default=USER,
         max_length=ROLE_MAX_LENGTH
     )
+    token_version = models.PositiveIntegerField(
+        verbose_name='Версия токенов',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -43,6 +54,37 @@ class ProjectUser(AbstractUser):
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Увеличивает версию токенов при смене роли или блокировке."""
+        loaded = getattr(self, '_loaded_values', {})
+        self._token_version_bumped = any(
+            field in loaded and loaded[field] != getattr(self, field)
+            for field in TOKEN_VERSION_FIELDS
+        )
+        if self._token_version_bumped:
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self.remember_values()
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.remember_values()
+
+    def remember_values(self):
+        """Запоминает значения полей, изменения которых отслеживаются."""
+        self._loaded_values = {
+            field: getattr(self, field) for field in TRACKED_FIELDS
+        }
+
     @property
     def is_admin(self):
         return self.role == ADMIN or self.is_superuser
@@ -50,3 +92,105 @@ class ProjectUser(AbstractUser):
     @property
     def is_moderator(self):
         return self.role == MODERATOR
+
+
+class OutboxMessage(models.Model):
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не доставлено'),
+    )
+
+    recipient = models.EmailField(
+        verbose_name='Получатель',
+        max_length=EMAIL_MAX_LENGTH
+    )
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=OUTBOX_SUBJECT_MAX_LENGTH
+    )
+    body = models.TextField(verbose_name='Текст письма')
+    status = models.CharField(
+        verbose_name='Статус',
+        choices=STATUSES,
+        default=PENDING,
+        max_length=OUTBOX_STATUS_MAX_LENGTH
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки',
+        default=0
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Следующая попытка',
+        default=timezone.now
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Создано',
+        auto_now_add=True
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Отправлено',
+        null=True,
+        blank=True
+    )
+    delivery_seconds = models.FloatField(
+        verbose_name='Задержка доставки, с',
+        null=True,
+        blank=True
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True
+    )
+    claim_token = models.UUIDField(
+        verbose_name='Метка забравшего воркера',
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        ordering = ('next_attempt_at', 'id')
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'],
+                name='outbox_status_next_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {self.recipient}'
+
+
+class UsedRefreshTokenQuerySet(models.QuerySet):
+
+    def delete_expired(self):
+        """Удаляет записи истёкших токенов: их отклонит и проверка срока."""
+        return self.filter(expires_at__lte=timezone.now()).delete()[0]
+
+
+class UsedRefreshToken(models.Model):
+    jti = models.CharField(
+        verbose_name='Идентификатор токена',
+        max_length=JTI_MAX_LENGTH,
+        unique=True
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='Срок действия токена',
+        db_index=True
+    )
+
+    objects = UsedRefreshTokenQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Использованный refresh-токен'
+        verbose_name_plural = 'Использованные refresh-токены'
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,190 @@
+import threading
+import uuid
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, connections, transaction
+from django.db.models import Avg, Count, Max, Min, Q
+from django.utils import timezone
+
+from api_yamdb.metrics import Gauge, SharedCounter, registry
+from users.models import OutboxMessage
+
+MAX_ERROR_LENGTH = 1000
+METRICS_WINDOW = timedelta(hours=1)
+
+# SQLite допускает только одного писателя, поэтому в нём запись между
+# потоками процесса сериализуется.
+_sqlite_lock = threading.Lock()
+
+deliveries_total = registry.register(SharedCounter(
+    'outbox_deliveries', 'Попытки отправки писем из очереди.', ('result',)
+))
+queue_gauges = {
+    'pending': registry.register(Gauge(
+        'outbox_pending_messages', 'Писем в очереди.'
+    )),
+    'failed': registry.register(Gauge(
+        'outbox_failed_messages', 'Недоставленных писем.'
+    )),
+    'oldest_pending_seconds': registry.register(Gauge(
+        'outbox_oldest_pending_seconds',
+        'Сколько ждёт самое старое письмо в очереди.'
+    )),
+    'latency_avg': registry.register(Gauge(
+        'outbox_delivery_latency_avg_seconds',
+        'Средняя задержка доставки за последний час.'
+    )),
+    'latency_max': registry.register(Gauge(
+        'outbox_delivery_latency_max_seconds',
+        'Максимальная задержка доставки за последний час.'
+    )),
+}
+
+
+def _db_lock():
+    return _sqlite_lock if connection.vendor == 'sqlite' else nullcontext()
+
+
+def enqueue_mail(subject, body, recipient):
+    """Записывает письмо в очередь на отправку.
+
+    При OUTBOX_EAGER письмо отправляется сразу после коммита транзакции,
+    без отдельного воркера.
+    """
+    message = OutboxMessage.objects.create(
+        subject=subject, body=body, recipient=recipient
+    )
+    if settings.OUTBOX_EAGER:
+        transaction.on_commit(lambda: deliver([message]))
+    return message
+
+
+def _ready_ids(now, size):
+    """id писем, готовых к отправке, в порядке очереди."""
+    ready = OutboxMessage.objects.filter(
+        status=OutboxMessage.PENDING, next_attempt_at__lte=now
+    ).order_by('next_attempt_at', 'id')
+    return list(ready.values_list('pk', flat=True)[:size])
+
+
+def claim_batch(size):
+    """Забирает из очереди до size писем, готовых к отправке.
+
+    Забранным письмам следующая попытка сразу переносится на
+    OUTBOX_LEASE секунд вперёд: другие воркеры их не возьмут, а если
+    воркер упадёт, письма вернутся в очередь по истечении этого срока.
+    Письма забираются условным UPDATE с меткой воркера: если несколько
+    воркеров выбрали одни и те же письма, каждое достанется тому, чей
+    UPDATE выполнился первым, в любой СУБД.
+    """
+    now = timezone.now()
+    token = uuid.uuid4()
+    with _db_lock():
+        OutboxMessage.objects.filter(
+            pk__in=_ready_ids(now, size),
+            status=OutboxMessage.PENDING,
+            next_attempt_at__lte=now,
+        ).update(
+            claim_token=token,
+            next_attempt_at=now + timedelta(seconds=settings.OUTBOX_LEASE)
+        )
+        return list(OutboxMessage.objects.filter(claim_token=token))
+
+
+def _mark_failed(message, error):
+    message.last_error = repr(error)[:MAX_ERROR_LENGTH]
+    if message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        message.status = OutboxMessage.FAILED
+        return
+    delay = settings.OUTBOX_RETRY_DELAY * 2 ** (message.attempts - 1)
+    message.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+
+
+def deliver(messages):
+    """Отправляет письма через одно соединение с почтовым сервером.
+
+    Результаты записываются одним запросом. Неудачные письма остаются в
+    очереди с экспоненциально растущей задержкой, после
+    OUTBOX_MAX_ATTEMPTS попыток помечаются как недоставленные.
+    Возвращает пару (отправлено, ошибок).
+    """
+    if not messages:
+        return 0, 0
+    sent = 0
+    backend = get_connection()
+    try:
+        backend.open()
+    except Exception as error:
+        for message in messages:
+            message.attempts += 1
+            _mark_failed(message, error)
+    else:
+        try:
+            for message in messages:
+                message.attempts += 1
+                try:
+                    EmailMessage(
+                        subject=message.subject,
+                        body=message.body,
+                        from_email=settings.DEFAULT_FROM_EMAIL,
+                        to=(message.recipient,),
+                        connection=backend,
+                    ).send()
+                except Exception as error:
+                    _mark_failed(message, error)
+                    continue
+                message.status = OutboxMessage.SENT
+                message.sent_at = timezone.now()
+                message.delivery_seconds = (
+                    message.sent_at - message.created_at
+                ).total_seconds()
+                message.last_error = ''
+                sent += 1
+        finally:
+            backend.close()
+    with _db_lock():
+        OutboxMessage.objects.bulk_update(messages, (
+            'status', 'attempts', 'next_attempt_at', 'sent_at',
+            'delivery_seconds', 'last_error',
+        ))
+    deliveries_total.inc(sent, result='sent')
+    deliveries_total.inc(len(messages) - sent, result='failed')
+    return sent, len(messages) - sent
+
+
+def process_batch(size):
+    """Забирает и отправляет одну пачку писем в потоке воркера."""
+    try:
+        return deliver(claim_batch(size))
+    finally:
+        connections.close_all()
+
+
+def outbox_metrics():
+    """Глубина очереди и задержка доставки писем за последний час."""
+    now = timezone.now()
+    recent = Q(status=OutboxMessage.SENT, sent_at__gte=now - METRICS_WINDOW)
+    pending = Q(status=OutboxMessage.PENDING)
+    metrics = OutboxMessage.objects.aggregate(
+        pending=Count('pk', filter=pending),
+        failed=Count('pk', filter=Q(status=OutboxMessage.FAILED)),
+        oldest_pending=Min('created_at', filter=pending),
+        sent_recently=Count('pk', filter=recent),
+        latency_avg=Avg('delivery_seconds', filter=recent),
+        latency_max=Max('delivery_seconds', filter=recent),
+    )
+    oldest = metrics.pop('oldest_pending')
+    metrics['oldest_pending_seconds'] = (
+        (now - oldest).total_seconds() if oldest else 0.0
+    )
+    return metrics
+
+
+@registry.register_collector
+def collect_outbox_metrics():
+    for name, value in outbox_metrics().items():
+        if name in queue_gauges:
+            queue_gauges[name].set(value or 0)
@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import ProjectUser
+from users.tokens import token_versions
+
+
+@receiver(post_save, sender=ProjectUser)
+def revoke_tokens_on_change(sender, instance, **kwargs):
+    if getattr(instance, '_token_version_bumped', False):
+        user_id, version = instance.pk, instance.token_version
+        transaction.on_commit(lambda: token_versions.set(user_id, version))
+
+
+@receiver(post_delete, sender=ProjectUser)
+def revoke_tokens_on_delete(sender, instance, **kwargs):
+    user_id, version = instance.pk, instance.token_version + 1
+    transaction.on_commit(lambda: token_versions.set(user_id, version))
@@ -0,0 +1,184 @@
+import time
+from threading import Lock
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from api_yamdb.constants import ADMIN, MODERATOR, USER
+from api_yamdb.shared_cache import get_shared_cache
+from users.models import ProjectUser, UsedRefreshToken
+
+ROLE_CLAIM = 'role'
+USERNAME_CLAIM = 'username'
+SUPERUSER_CLAIM = 'is_superuser'
+VERSION_CLAIM = 'ver'
+LOCAL_VERSIONS_MAX_SIZE = 10000
+REVOKED_VERSION = float('inf')
+
+
+def add_user_claims(token, user):
+    token[USERNAME_CLAIM] = user.username
+    token[ROLE_CLAIM] = user.role
+    token[SUPERUSER_CLAIM] = user.is_superuser
+    token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+class UserAccessToken(AccessToken):
+    """Access-токен, в claims которого записаны роль и версия
+    пользователя."""
+
+    @classmethod
+    def for_user(cls, user):
+        return add_user_claims(super().for_user(user), user)
+
+
+class UserRefreshToken(RefreshToken):
+    """Refresh-токен с теми же claims, что и у access-токена."""
+
+    @classmethod
+    def for_user(cls, user):
+        return add_user_claims(super().for_user(user), user)
+
+    @property
+    def access_token(self):
+        access = UserAccessToken()
+        access.set_exp(from_time=self.current_time)
+        for claim, value in self.payload.items():
+            if claim not in self.no_copy_claims:
+                access[claim] = value
+        return access
+
+    def rotate(self):
+        """Вносит токен в чёрный список и превращает его в новый.
+
+        Возвращает False, если токен уже был использован.
+        """
+        if not refresh_blacklist.add(self):
+            return False
+        self.set_jti()
+        self.set_exp()
+        return True
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, восстановленный из claims токена без запроса к БД."""
+
+    def __str__(self):
+        return self.username
+
+    @cached_property
+    def role(self):
+        return self.token.get(ROLE_CLAIM, USER)
+
+    @cached_property
+    def version(self):
+        return self.token[VERSION_CLAIM]
+
+    @property
+    def is_admin(self):
+        return self.role == ADMIN or self.is_superuser
+
+    @property
+    def is_moderator(self):
+        return self.role == MODERATOR
+
+
+class TokenVersionCache:
+    """Актуальные версии пользователей для отзыва выданных токенов.
+
+    Версия хранится в общем для всех процессов кеше не дольше
+    access-токена: все токены со старой версией к этому времени истекают
+    сами. Если записи в кеше нет, версия читается из базы, поэтому
+    вытеснение записи стоит одного запроса, а не пропуска отозванного
+    токена. Поверх общего кеша в памяти процесса держится словарь с
+    коротким сроком жизни записей, поэтому большинство запросов не
+    обращаются ни к базе, ни к кешу.
+    """
+
+    def __init__(self):
+        self._local = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def key(user_id):
+        return f'token-version:{user_id}'
+
+    def _remember(self, user_id, version):
+        expires = time.monotonic() + settings.TOKEN_VERSION_CACHE_TTL
+        with self._lock:
+            if len(self._local) >= LOCAL_VERSIONS_MAX_SIZE:
+                self._local.clear()
+            self._local[user_id] = (version, expires)
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._local.get(user_id)
+        if entry is not None and entry[1] > time.monotonic():
+            return entry[0]
+        shared = get_shared_cache()
+        version = shared.get(self.key(user_id))
+        if version is None:
+            version = self.load(user_id)
+            # add, а не set: версия, записанная сигналом после чтения
+            # из базы, не должна затираться прочитанной старой.
+            shared.add(self.key(user_id), version, self.timeout())
+        self._remember(user_id, version)
+        return version
+
+    @staticmethod
+    def load(user_id):
+        """Версия из базы; токены удалённого пользователя отозваны все."""
+        version = ProjectUser.objects.filter(pk=user_id).values_list(
+            'token_version', flat=True
+        ).first()
+        return REVOKED_VERSION if version is None else version
+
+    @staticmethod
+    def timeout():
+        return api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+
+    def set(self, user_id, version):
+        get_shared_cache().set(self.key(user_id), version, self.timeout())
+        self._remember(user_id, version)
+
+    def is_revoked(self, user_id, version):
+        return version < self.get(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+
+class RefreshTokenBlacklist:
+    """Использованные refresh-токены в таблице UsedRefreshToken.
+
+    Хранится только jti и только до истечения срока самого токена, после
+    чего он отклоняется и без чёрного списка; истёкшие записи удаляет
+    команда clear_used_tokens.
+    """
+
+    def add(self, token):
+        """Возвращает False, если токен уже есть в списке.
+
+        Повторную запись отклоняет уникальный индекс, поэтому из
+        параллельных запросов с одним токеном успешен только один.
+        """
+        try:
+            with transaction.atomic():
+                UsedRefreshToken.objects.create(
+                    jti=token[api_settings.JTI_CLAIM],
+                    expires_at=datetime_from_epoch(token['exp'])
+                )
+        except IntegrityError:
+            return False
+        return True
+
+
+token_versions = TokenVersionCache()
+refresh_blacklist = RefreshTokenBlacklist()
@@ -1,11 +1,15 @@
 from django.urls import path
 
 from api.views import (
-    UserCreateViewSet, UserTokenViewSet
+    TokenRefreshViewSet, UserCreateViewSet, UserTokenViewSet
 )
 
 
 urlpatterns = [
     path('signup/', UserCreateViewSet.as_view(), name='signup'),
-    path('token/', UserTokenViewSet.as_view(), name='token')
+    path('token/', UserTokenViewSet.as_view(), name='token'),
+    path(
+        'token/refresh/', TokenRefreshViewSet.as_view(),
+        name='token-refresh'
+    ),
 ]
@@ -0,0 +1,377 @@
+"""Бенчмарк эндпоинтов /api/v1/.
+
+Не входит в обычный прогон тестов, запускается явно:
+
+    BENCH_TITLES=500 python -m pytest tests/benchmarks/bench_api.py
+
+Размер данных и число повторов задаются переменными окружения
+BENCH_USERS, BENCH_TITLES, BENCH_REVIEWS, BENCH_COMMENTS, BENCH_REPEAT.
+Результат пишется в JSON (BENCH_OUTPUT), который удобно сравнивать
+между коммитами.
+"""
+import json
+import os
+import platform
+import time
+from statistics import median
+
+import django
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api.urls import router_v1
+from reviews.models import Category, Comment, Genre, Review, Title
+from tests.benchmarks.dataset import seed_dataset
+from users.models import ProjectUser
+from users.tokens import UserAccessToken, UserRefreshToken
+from users.urls import urlpatterns as auth_urlpatterns
+
+SIZES = {
+    'users': int(os.environ.get('BENCH_USERS', 50)),
+    'titles': int(os.environ.get('BENCH_TITLES', 100)),
+    'reviews': int(os.environ.get('BENCH_REVIEWS', 1000)),
+    'comments': int(os.environ.get('BENCH_COMMENTS', 2000)),
+}
+REPEAT = int(os.environ.get('BENCH_REPEAT', 20))
+OUTPUT = os.environ.get('BENCH_OUTPUT', 'bench_output.json')
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, round(percent / 100 * len(ordered) + 0.5) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def registered_route_names():
+    names = {
+        route.name.format(basename=basename)
+        for _, viewset, basename in router_v1.registry
+        for route in router_v1.get_routes(viewset)
+        if router_v1.get_method_map(viewset, route.mapping)
+    }
+    names.add(router_v1.root_view_name)
+    names.update(pattern.name for pattern in auth_urlpatterns)
+    return names
+
+
+class Context:
+    """Данные и клиенты, доступные сценариям."""
+
+    def __init__(self, ids):
+        self.ids = ids
+        self.admin = ProjectUser.objects.create_user(
+            username='bench_admin', email='bench_admin@yamdb.fake',
+            role='admin'
+        )
+        self.user = ProjectUser.objects.get(pk=ids['users'][0])
+        self.clients = {
+            'anon': APIClient(),
+            'user': self.authorized(self.user),
+            'admin': self.authorized(self.admin),
+        }
+        self.review = Review.objects.filter(
+            pk__in=ids['reviews']
+        ).order_by('pk').first()
+        self.comment = Comment.objects.filter(
+            review=self.review
+        ).order_by('pk').first() or Comment.objects.create(
+            review=self.review, author=self.user, text='Комментарий'
+        )
+
+    @staticmethod
+    def authorized(user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {UserAccessToken.for_user(user)}'
+        )
+        return client
+
+    def new_title(self, idx):
+        title = Title.objects.create(
+            name=f'Временное произведение {idx}', year=2000,
+            category_id=self.ids['categories'][0]
+        )
+        title.genre.set(self.ids['genres'][:1])
+        return title
+
+
+def title_kwargs(ctx):
+    return {'pk': ctx.review.title_id}
+
+
+def review_kwargs(ctx):
+    return {'title_id': ctx.review.title_id, 'pk': ctx.review.pk}
+
+
+def comment_kwargs(ctx):
+    return {
+        'title_id': ctx.review.title_id,
+        'review_id': ctx.review.pk,
+        'pk': ctx.comment.pk,
+    }
+
+
+def comments_list_kwargs(ctx):
+    return {'title_id': ctx.review.title_id, 'review_id': ctx.review.pk}
+
+
+def new_review(ctx, idx):
+    title = ctx.new_title(idx)
+    return Review.objects.create(
+        title=title, author=ctx.admin, text='Отзыв', score=5
+    )
+
+
+# (имя маршрута, метод, клиент, функция (ctx, номер итерации) -> (url, data))
+SCENARIOS = (
+    ('api-root', 'GET', 'anon',
+     lambda ctx, idx: (reverse('api-root'), None)),
+    ('users-list', 'GET', 'admin',
+     lambda ctx, idx: (reverse('users-list'), None)),
+    ('users-list', 'POST', 'admin',
+     lambda ctx, idx: (reverse('users-list'), {
+         'username': f'bench_new_{idx}',
+         'email': f'bench_new_{idx}@yamdb.fake',
+     })),
+    ('users-detail', 'GET', 'admin',
+     lambda ctx, idx: (
+         reverse('users-detail', kwargs={'username': ctx.user.username}),
+         None
+     )),
+    ('users-detail', 'PATCH', 'admin',
+     lambda ctx, idx: (
+         reverse('users-detail', kwargs={'username': ctx.user.username}),
+         {'bio': f'bio {idx}'}
+     )),
+    ('users-detail', 'DELETE', 'admin',
+     lambda ctx, idx: (
+         reverse('users-detail', kwargs={
+             'username': ProjectUser.objects.create(
+                 username=f'bench_del_{idx}',
+                 email=f'bench_del_{idx}@yamdb.fake'
+             ).username
+         }),
+         None
+     )),
+    ('users-get-me-data', 'GET', 'user',
+     lambda ctx, idx: (reverse('users-get-me-data'), None)),
+    ('users-get-me-data', 'PATCH', 'user',
+     lambda ctx, idx: (reverse('users-get-me-data'), {'bio': str(idx)})),
+    ('categories-list', 'GET', 'anon',
+     lambda ctx, idx: (reverse('categories-list'), None)),
+    ('categories-list', 'GET', 'anon',
+     lambda ctx, idx: (reverse('categories-list') + '?search=1', None)),
+    ('categories-list', 'POST', 'admin',
+     lambda ctx, idx: (reverse('categories-list'), {
+         'name': f'Новая {idx}', 'slug': f'bench-new-category-{idx}'
+     })),
+    ('categories-detail', 'DELETE', 'admin',
+     lambda ctx, idx: (
+         reverse('categories-detail', kwargs={
+             'slug': Category.objects.create(
+                 name='Удаляемая', slug=f'bench-del-category-{idx}'
+             ).slug
+         }),
+         None
+     )),
+    ('genres-list', 'GET', 'anon',
+     lambda ctx, idx: (reverse('genres-list'), None)),
+    ('genres-list', 'POST', 'admin',
+     lambda ctx, idx: (reverse('genres-list'), {
+         'name': f'Новый {idx}', 'slug': f'bench-new-genre-{idx}'
+     })),
+    ('genres-detail', 'DELETE', 'admin',
+     lambda ctx, idx: (
+         reverse('genres-detail', kwargs={
+             'slug': Genre.objects.create(
+                 name='Удаляемый', slug=f'bench-del-genre-{idx}'
+             ).slug
+         }),
+         None
+     )),
+    ('titles-list', 'GET', 'anon',
+     lambda ctx, idx: (reverse('titles-list'), None)),
+    ('titles-list', 'GET', 'anon',
+     lambda ctx, idx: (
+         reverse('titles-list') + '?genre=bench-genre-0&page=2', None
+     )),
+    ('titles-list', 'POST', 'admin',
+     lambda ctx, idx: (reverse('titles-list'), {
+         'name': f'Новое произведение {idx}',
+         'year': 2000,
+         'genre': ['bench-genre-0', 'bench-genre-1'],
+         'category': 'bench-category-0',
+     })),
+    ('titles-detail', 'GET', 'anon',
+     lambda ctx, idx: (
+         reverse('titles-detail', kwargs=title_kwargs(ctx)), None
+     )),
+    ('titles-detail', 'PATCH', 'admin',
+     lambda ctx, idx: (
+         reverse('titles-detail', kwargs=title_kwargs(ctx)),
+         {'description': f'Описание {idx}'}
+     )),
+    ('titles-detail', 'DELETE', 'admin',
+     lambda ctx, idx: (
+         reverse('titles-detail', kwargs={'pk': ctx.new_title(idx).pk}),
+         None
+     )),
+    ('titles-rating-stats', 'GET', 'anon',
+     lambda ctx, idx: (
+         reverse('titles-rating-stats', kwargs=title_kwargs(ctx)), None
+     )),
+    ('leaderboards-list', 'GET', 'anon',
+     lambda ctx, idx: (
+         reverse('leaderboards-list'), {'genre': 'bench-genre-0'}
+     )),
+    ('search-list', 'GET', 'anon',
+     lambda ctx, idx: (reverse('search-list'), {'q': 'отзыв'})),
+    ('reviews-list', 'GET', 'anon',
+     lambda ctx, idx: (
+         reverse('reviews-list', kwargs={'title_id': ctx.review.title_id}),
+         None
+     )),
+    ('reviews-list', 'POST', 'admin',
+     lambda ctx, idx: (
+         reverse('reviews-list', kwargs={
+             'title_id': ctx.new_title(idx).pk
+         }),
+         {'text': 'Отзыв', 'score': 7}
+     )),
+    ('reviews-detail', 'GET', 'anon',
+     lambda ctx, idx: (
+         reverse('reviews-detail', kwargs=review_kwargs(ctx)), None
+     )),
+    ('reviews-detail', 'PATCH', 'admin',
+     lambda ctx, idx: (
+         reverse('reviews-detail', kwargs=review_kwargs(ctx)),
+         {'score': idx % 10 + 1}
+     )),
+    ('reviews-detail', 'DELETE', 'admin',
+     lambda ctx, idx: (
+         reverse('reviews-detail', kwargs={
+             'title_id': (review := new_review(ctx, idx)).title_id,
+             'pk': review.pk,
+         }),
+         None
+     )),
+    ('comments-list', 'GET', 'anon',
+     lambda ctx, idx: (
+         reverse('comments-list', kwargs=comments_list_kwargs(ctx)), None
+     )),
+    ('comments-list', 'POST', 'user',
+     lambda ctx, idx: (
+         reverse('comments-list', kwargs=comments_list_kwargs(ctx)),
+         {'text': f'Комментарий {idx}'}
+     )),
+    ('comments-detail', 'GET', 'anon',
+     lambda ctx, idx: (
+         reverse('comments-detail', kwargs=comment_kwargs(ctx)), None
+     )),
+    ('comments-detail', 'PATCH', 'admin',
+     lambda ctx, idx: (
+         reverse('comments-detail', kwargs=comment_kwargs(ctx)),
+         {'text': f'Комментарий {idx}'}
+     )),
+    ('comments-detail', 'DELETE', 'admin',
+     lambda ctx, idx: (
+         reverse('comments-detail', kwargs={
+             **comments_list_kwargs(ctx),
+             'pk': Comment.objects.create(
+                 review=ctx.review, author=ctx.admin, text='Удаляемый'
+             ).pk,
+         }),
+         None
+     )),
+    ('signup', 'POST', 'anon',
+     lambda ctx, idx: (reverse('signup'), {
+         'username': f'bench_signup_{idx}',
+         'email': f'bench_signup_{idx}@yamdb.fake',
+     })),
+    ('token', 'POST', 'anon',
+     lambda ctx, idx: (reverse('token'), {
+         'username': ctx.user.username,
+         'confirmation_code': default_token_generator.make_token(ctx.user),
+     })),
+    ('metrics', 'GET', 'anon', lambda ctx, idx: (reverse('metrics'), None)),
+    ('token-refresh', 'POST', 'anon',
+     lambda ctx, idx: (reverse('token-refresh'), {
+         'refresh': str(UserRefreshToken.for_user(ctx.user)),
+     })),
+)
+
+
+def run_scenario(ctx, method, role, build):
+    client = ctx.clients[role]
+    send = getattr(client, method.lower())
+    latencies, queries, sizes, statuses = [], [], [], set()
+    for idx in range(REPEAT):
+        url, data = build(ctx, idx)
+        kwargs = {} if data is None else {'data': data, 'format': 'json'}
+        if method == 'GET' and data is not None:
+            kwargs = {'data': data}
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = send(url, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(len(context.captured_queries))
+        sizes.append(len(response.content))
+        statuses.add(response.status_code)
+    return {
+        'url': url,
+        'status': sorted(statuses),
+        'queries': median(queries),
+        'queries_max': max(queries),
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'response_bytes': median(sizes),
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_api_benchmark(settings):
+    # Лимиты не должны срабатывать, но сами проверки остаются в замерах.
+    settings.AUTH_THROTTLE_RATES = {
+        scope: '1000000/min' for scope in settings.AUTH_THROTTLE_RATES
+    }
+    # Без METRICS_TOKEN /metrics отдаётся только при DEBUG.
+    settings.DEBUG = True
+    covered = {name for name, *_ in SCENARIOS}
+    missing = registered_route_names() - covered
+    assert not missing, (
+        f'Для маршрутов {sorted(missing)} не описаны сценарии бенчмарка.'
+    )
+
+    ctx = Context(seed_dataset(**SIZES))
+    results = {}
+    for name, method, role, build in SCENARIOS:
+        result = run_scenario(ctx, method, role, build)
+        key = f'{method} {name}'
+        if key in results:
+            key = f'{key} {result["url"]}'
+        results[key] = result
+
+    report = {
+        'dataset': SIZES,
+        'repeat': REPEAT,
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+        },
+        'endpoints': results,
+    }
+    with open(OUTPUT, 'w', encoding='utf-8') as output:
+        json.dump(report, output, ensure_ascii=False, indent=2,
+                  sort_keys=True)
+        output.write('\n')
+    for key, result in results.items():
+        print(
+            f'{key:<40} {str(result["status"]):<12} '
+            f'q={result["queries"]:<5} p50={result["p50_ms"]:>8}ms '
+            f'p95={result["p95_ms"]:>8}ms {result["response_bytes"]}B'
+        )
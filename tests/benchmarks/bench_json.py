@@ -0,0 +1,72 @@
+"""Микробенчмарк кодирования страницы из 100 произведений в JSON.
+
+Запускается явно:
+
+    BENCH_REPEAT=200 python -m pytest tests/benchmarks/bench_json.py
+
+Сравнивает стандартный JSONRenderer и FastJSONRenderer (orjson), если
+orjson установлен. Результат пишется в JSON (BENCH_JSON_OUTPUT).
+"""
+import json
+import os
+import time
+from statistics import median
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+from api.serializers import TitleSerializer
+from reviews.models import Title
+from tests.benchmarks.dataset import seed_dataset
+
+PAGE_SIZE = 100
+REPEAT = int(os.environ.get('BENCH_REPEAT', 200))
+OUTPUT = os.environ.get('BENCH_JSON_OUTPUT', 'bench_json_output.json')
+
+
+def measure(render, data):
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        render(data)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'p50_ms': round(median(timings), 4),
+        'min_ms': round(min(timings), 4),
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_json_benchmark():
+    seed_dataset(users=20, titles=PAGE_SIZE, reviews=500, comments=0)
+    titles = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')[:PAGE_SIZE]
+    data = {
+        'count': PAGE_SIZE,
+        'next': None,
+        'previous': None,
+        'results': TitleSerializer(titles, many=True).data,
+    }
+    assert len(data['results']) == PAGE_SIZE
+
+    results = {'json': measure(JSONRenderer().render, data)}
+    if renderers.orjson is not None:
+        fast = renderers.FastJSONRenderer()
+        assert fast.render(data) == JSONRenderer().render(data)
+        results['orjson'] = measure(fast.render, data)
+        results['speedup'] = round(
+            results['json']['p50_ms'] / results['orjson']['p50_ms'], 2
+        )
+    report = {
+        'page_size': PAGE_SIZE,
+        'repeat': REPEAT,
+        'response_bytes': len(JSONRenderer().render(data)),
+        'results': results,
+    }
+    with open(OUTPUT, 'w', encoding='utf-8') as output:
+        json.dump(report, output, ensure_ascii=False, indent=2,
+                  sort_keys=True)
+        output.write('\n')
+    print(json.dumps(report, ensure_ascii=False))
@@ -0,0 +1,95 @@
+import random
+
+from reviews.models import (
+    Category, Comment, Genre, GenreTitle, LeaderboardEntry, Review, Title
+)
+from users.models import ProjectUser
+
+CATEGORIES_COUNT = 5
+GENRES_COUNT = 10
+MAX_GENRES_PER_TITLE = 3
+
+
+def seed_dataset(users=50, titles=100, reviews=1000, comments=2000, seed=0):
+    """Заполняет БД синтетическими данными заданного размера.
+
+    Отзывы распределяются по парам (автор, произведение) без повторов,
+    поэтому их не может быть больше, чем users * titles.
+    Возвращает словарь с id созданных объектов.
+    """
+    if reviews > users * titles:
+        raise ValueError(
+            f'Нельзя создать {reviews} отзывов для {users} пользователей '
+            f'и {titles} произведений'
+        )
+    rnd = random.Random(seed)
+    ProjectUser.objects.bulk_create(
+        ProjectUser(
+            username=f'bench_user_{idx}',
+            email=f'bench_user_{idx}@yamdb.fake',
+        ) for idx in range(users)
+    )
+    Category.objects.bulk_create(
+        Category(name=f'Категория {idx}', slug=f'bench-category-{idx}')
+        for idx in range(CATEGORIES_COUNT)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {idx}', slug=f'bench-genre-{idx}')
+        for idx in range(GENRES_COUNT)
+    )
+    user_ids = list(ProjectUser.objects.filter(
+        username__startswith='bench_user_'
+    ).values_list('pk', flat=True))
+    category_ids = list(Category.objects.filter(
+        slug__startswith='bench-category-'
+    ).values_list('pk', flat=True))
+    genre_ids = list(Genre.objects.filter(
+        slug__startswith='bench-genre-'
+    ).values_list('pk', flat=True))
+
+    Title.objects.bulk_create(
+        Title(
+            name=f'Произведение {idx}',
+            year=rnd.randint(1900, 2020),
+            description=f'Описание произведения {idx}. ' * 5,
+            category_id=rnd.choice(category_ids),
+        ) for idx in range(titles)
+    )
+    title_ids = list(Title.objects.filter(
+        name__startswith='Произведение '
+    ).values_list('pk', flat=True))
+    GenreTitle.objects.bulk_create(
+        GenreTitle(title_id=title_id, genre_id=genre_id)
+        for title_id in title_ids
+        for genre_id in rnd.sample(
+            genre_ids, rnd.randint(1, MAX_GENRES_PER_TITLE)
+        )
+    )
+
+    Review.objects.bulk_create(
+        Review(
+            title_id=title_ids[idx % titles],
+            author_id=user_ids[idx // titles],
+            text=f'Отзыв {idx}',
+            score=rnd.randint(1, 10),
+        ) for idx in range(reviews)
+    )
+    review_ids = list(Review.objects.filter(
+        title_id__in=title_ids
+    ).values_list('pk', flat=True))
+    Comment.objects.bulk_create(
+        Comment(
+            review_id=rnd.choice(review_ids),
+            author_id=rnd.choice(user_ids),
+            text=f'Комментарий {idx}',
+        ) for idx in range(comments if review_ids else 0)
+    )
+    # Как и загрузчик CSV, массовое создание минует сигналы рейтингов.
+    LeaderboardEntry.objects.rebuild()
+    return {
+        'users': user_ids,
+        'categories': category_ids,
+        'genres': genre_ids,
+        'titles': title_ids,
+        'reviews': review_ids,
+    }
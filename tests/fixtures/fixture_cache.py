@@ -0,0 +1,21 @@
+import pytest
+from django.core.cache import cache, caches
+
+from api_yamdb.constants import SHARED_CACHE
+from users.tokens import token_versions
+
+
+def clear_caches(with_db):
+    cache.clear()
+    if with_db:
+        # Общий кеш хранится в БД, доступной только тестам с django_db.
+        caches[SHARED_CACHE].clear()
+    token_versions.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(request):
+    with_db = request.node.get_closest_marker('django_db') is not None
+    clear_caches(with_db)
+    yield
+    clear_caches(with_db)
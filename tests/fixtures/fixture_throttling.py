@@ -0,0 +1,13 @@
+import pytest
+
+from api.throttling import get_store
+
+MEMORY_STORE = 'api.throttling.MemoryThrottleStore'
+
+
+@pytest.fixture(autouse=True)
+def memory_throttle_store(settings):
+    settings.AUTH_THROTTLE_STORE = MEMORY_STORE
+    get_store(MEMORY_STORE).clear()
+    yield
+    get_store(MEMORY_STORE).clear()
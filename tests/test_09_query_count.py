@@ -0,0 +1,229 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from tests.utils import app_queries, create_categories, create_genre
+from users.tokens import UserAccessToken
+
+
+def count_queries(request, url, **kwargs):
+    with CaptureQueriesContext(connection) as context:
+        response = request(url, **kwargs)
+    return response, len(app_queries(context))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09QueryCount:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    def create_titles(self, admin_client, genres, categories, count):
+        title_ids = []
+        for idx in range(count):
+            response = admin_client.post(self.TITLES_URL, data={
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx,
+                'genre': [genre['slug'] for genre in genres],
+                'category': categories[idx % len(categories)]['slug'],
+            })
+            assert response.status_code == HTTPStatus.CREATED
+            title_ids.append(response.json()['id'])
+        return title_ids
+
+    def test_01_titles_list_query_count(self, client, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        self.create_titles(admin_client, genres, categories, 1)
+        response, single_page_queries = count_queries(
+            client.get, self.TITLES_URL
+        )
+        assert len(response.json()['results']) == 1
+
+        self.create_titles(admin_client, genres, categories, 4)
+        response, full_page_queries = count_queries(
+            client.get, self.TITLES_URL
+        )
+        assert len(response.json()['results']) == 5
+        assert full_page_queries == single_page_queries, (
+            f'Проверьте, что количество запросов к БД при GET-запросе к '
+            f'`{self.TITLES_URL}` не зависит от количества произведений на '
+            'странице: для жанров и категорий должны использоваться '
+            '`select_related` и `prefetch_related`.'
+        )
+
+    def test_02_title_write_query_count(self, client, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        data = {
+            'name': 'Один жанр',
+            'year': 2001,
+            'genre': [genres[0]['slug']],
+            'category': categories[0]['slug'],
+        }
+        _, one_genre_queries = count_queries(
+            admin_client.post, self.TITLES_URL, data=data
+        )
+        data['name'] = 'Все жанры'
+        data['genre'] = [genre['slug'] for genre in genres]
+        response, all_genres_queries = count_queries(
+            admin_client.post, self.TITLES_URL, data=data
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(response.json()['genre']) == len(genres)
+        assert all_genres_queries - one_genre_queries < len(genres), (
+            f'Проверьте, что ответ на POST-запрос к `{self.TITLES_URL}` '
+            'формируется без отдельного запроса к БД для каждого жанра.'
+        )
+
+        url = self.TITLE_DETAIL_URL_TEMPLATE.format(
+            title_id=response.json()['id']
+        )
+        _, detail_queries = count_queries(client.get, url)
+        assert detail_queries <= 2, (
+            f'Проверьте, что GET-запрос к `{self.TITLE_DETAIL_URL_TEMPLATE}` '
+            'получает произведение, категорию и жанры не более чем '
+            'двумя запросами к БД.'
+        )
+
+    def test_03_signup_query_count(self, client, settings):
+        settings.OUTBOX_EAGER = False
+        url = '/api/v1/auth/signup/'
+        data = {'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url, data=data)
+        assert response.status_code == HTTPStatus.OK
+        new_user_queries = [
+            query['sql'] for query in context.captured_queries
+            if not query['sql'].startswith(('BEGIN', 'SAVEPOINT', 'RELEASE'))
+        ]
+        assert len(new_user_queries) == 3, (
+            f'Проверьте, что регистрация через `{url}` проверяет username '
+            'и email одним запросом, затем создаёт пользователя и письмо.'
+        )
+        response, repeat_queries = count_queries(client.post, url, data=data)
+        assert response.status_code == HTTPStatus.OK
+        assert repeat_queries <= 2
+        response, conflict_queries = count_queries(client.post, url, data={
+            'username': 'new_user', 'email': 'other@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert conflict_queries == 1
+
+    def test_04_nested_parent_resolved_once(self, client, admin_client,
+                                            user_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        title_id, other_title_id = self.create_titles(
+            admin_client, genres, categories, 2
+        )
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                reviews_url, data={'text': 'Отзыв', 'score': 5}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        title_selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "reviews_title"' in query['sql']
+        ]
+        assert len(title_selects) == 1 and 'LIMIT 1' in title_selects[0], (
+            f'Проверьте, что POST-запрос к `{reviews_url}` проверяет '
+            'произведение одним запросом на существование.'
+        )
+
+        review_id = response.json()['id']
+        review_url = f'{reviews_url}{review_id}/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(review_url)
+        assert response.status_code == HTTPStatus.OK
+        assert not any(
+            'FROM "reviews_title"' in query['sql']
+            for query in context.captured_queries
+        ), (
+            f'Проверьте, что GET-запрос к `{review_url}` ищет отзыв сразу '
+            'по id произведения, без отдельного запроса к произведению.'
+        )
+
+        comments_url = f'{review_url}comments/'
+        response = user_client.post(comments_url, data={'text': 'Да'})
+        assert response.status_code == HTTPStatus.CREATED
+        missing_urls = (
+            f'/api/v1/titles/{other_title_id}/reviews/{review_id}/',
+            f'/api/v1/titles/{other_title_id}/reviews/{review_id}/comments/',
+            f'/api/v1/titles/{other_title_id}/reviews/{review_id}/comments/'
+            f'{response.json()["id"]}/',
+            '/api/v1/titles/0/reviews/',
+        )
+        for url in missing_urls:
+            assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что GET-запрос к `{url}` с несуществующим '
+                'родительским объектом возвращает ответ со статусом 404.'
+            )
+        response = user_client.post(
+            missing_urls[1], data={'text': 'Нет'}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_05_author_query_count(self, client, admin_client, user_client,
+                                   moderator_client, admin, user, moderator):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        title_id, = self.create_titles(admin_client, genres, categories, 1)
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        review_ids = []
+        for author_client in (user_client, moderator_client, admin_client):
+            response = author_client.post(
+                reviews_url, data={'text': 'Отзыв', 'score': 5}
+            )
+            assert response.status_code == HTTPStatus.CREATED
+            review_ids.append(response.json()['id'])
+        comments_url = f'{reviews_url}{review_ids[0]}/comments/'
+        for author_client in (user_client, moderator_client, admin_client):
+            response = author_client.post(comments_url, data={'text': 'Да'})
+            assert response.status_code == HTTPStatus.CREATED
+        comment_id = response.json()['id']
+
+        for url in (reviews_url, comments_url):
+            response, list_queries = count_queries(client.get, url)
+            assert len(response.json()['results']) == 3
+            assert list_queries == 3, (
+                f'Проверьте, что GET-запрос к `{url}` получает авторов '
+                'вместе со списком, без запроса на каждого автора.'
+            )
+        # Токен с claims не требует загрузки пользователя при
+        # аутентификации, когда версия пользователя уже в кеше.
+        stateless_client = APIClient()
+        stateless_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {UserAccessToken.for_user(moderator)}'
+        )
+        stateless_client.get(reviews_url)
+        detail_urls = (
+            (f'{reviews_url}{review_ids[0]}/', user.username),
+            (f'{comments_url}{comment_id}/', admin.username),
+        )
+        for url, author in detail_urls:
+            response, detail_queries = count_queries(client.get, url)
+            assert response.json()['author'] == author
+            assert detail_queries == 1, (
+                f'Проверьте, что GET-запрос к `{url}` получает объект и '
+                'его автора одним запросом.'
+            )
+            with CaptureQueriesContext(connection) as context:
+                response = stateless_client.patch(
+                    url, data={'text': 'Новый текст'}
+                )
+            assert response.status_code == HTTPStatus.OK
+            assert response.json()['author'] == author
+            assert not any(
+                query['sql'].startswith('SELECT')
+                and 'FROM "users_projectuser"' in query['sql']
+                for query in context.captured_queries
+            ), (
+                f'Проверьте, что PATCH-запрос к `{url}` проверяет права по '
+                'id автора, не загружая его отдельным запросом.'
+            )
@@ -0,0 +1,76 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import transaction
+
+from api.caching import BULK_NAMESPACE, bump_version, get_version
+from reviews.models import Genre
+from tests.utils import create_categories
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10ResponseCache:
+
+    CATEGORY_URL = '/api/v1/categories/'
+    GENRES_URL = '/api/v1/genres/'
+
+    def test_01_cached_list_is_invalidated(self, client, admin_client):
+        categories = create_categories(admin_client)
+        response = client.get(self.CATEGORY_URL)
+        assert response.json()['count'] == len(categories)
+        etag = response.get('ETag')
+        assert etag, (
+            f'Проверьте, что ответ на GET-запрос к `{self.CATEGORY_URL}` '
+            'содержит заголовок `ETag`.'
+        )
+
+        response = client.get(self.CATEGORY_URL, {'search': 'Книги'})
+        assert response.json()['results'] == categories[1:], (
+            'Проверьте, что ответы кешируются с учётом строки запроса.'
+        )
+
+        response = client.get(self.CATEGORY_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{self.CATEGORY_URL}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+
+        admin_client.delete(f'{self.CATEGORY_URL}{categories[0]["slug"]}/')
+        response = client.get(self.CATEGORY_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после удаления категории закешированный ответ '
+            'и его `ETag` становятся неактуальными.'
+        )
+        assert response.json()['results'] == categories[1:]
+
+    def test_02_cache_follows_orm_changes(self, client):
+        response = client.get(self.GENRES_URL)
+        assert response.json()['count'] == 0
+        Genre.objects.create(name='Драма', slug='drama')
+        response = client.get(self.GENRES_URL)
+        assert response.json()['count'] == 1, (
+            'Проверьте, что изменения жанров вне API (например, в админке) '
+            'сбрасывают кеш списка жанров.'
+        )
+
+    def test_03_bulk_and_commit_invalidation(self, client):
+        response = client.get(self.GENRES_URL)
+        etag = response['ETag']
+        Genre.objects.bulk_create([Genre(name='Драма', slug='drama')])
+        bump_version(BULK_NAMESPACE)
+        response = client.get(self.GENRES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что массовая загрузка данных сбрасывает кеш '
+            'списка жанров.'
+        )
+        assert response.json()['count'] == 1
+
+        version = get_version('genre')
+        with transaction.atomic():
+            Genre.objects.create(name='Ужасы', slug='horror')
+            assert get_version('genre') == version, (
+                'Проверьте, что версия кеша увеличивается только после '
+                'фиксации транзакции.'
+            )
+        assert get_version('genre') != version
+        assert client.get(self.GENRES_URL).json()['count'] == 2
@@ -0,0 +1,119 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.importer import CSVImporter, dependency_graph, import_files
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from users.models import ProjectUser
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11CSVImporter:
+
+    def write_csv(self, tmp_path, name, content):
+        path = tmp_path / name
+        path.write_text(content, encoding='utf-8')
+        return path
+
+    def test_01_import_in_chunks(self, tmp_path, user, admin):
+        Category.objects.create(id=1, name='Фильм', slug='movie')
+        titles = self.write_csv(tmp_path, 'titles.csv', (
+            'id,name,year,category\n'
+            '1,Первое,1994,1\n'
+            '2,Второе,1995,1\n'
+            '3,Без категории,1996,99\n'
+            '4,Из будущего,3000,1\n'
+        ))
+        result = CSVImporter(Title, titles, chunk_size=2).run()
+        assert (result.rows, result.accepted, result.rejected) == (4, 2, 2), (
+            'Проверьте, что строки с несуществующим внешним ключом или '
+            'невалидными значениями отклоняются, а остальные загружаются.'
+        )
+        assert len(result.errors) == 2
+        assert set(Title.objects.values_list('id', flat=True)) == {1, 2}
+
+        reviews = self.write_csv(tmp_path, 'review.csv', (
+            'id,title_id,text,author,score,pub_date\n'
+            f'1,1,"Много\nстрок",{user.id},4,2019-09-24T21:08:21.567Z\n'
+            f'2,1,Отзыв,{admin.id},8,2019-09-24T21:08:21.567Z\n'
+            f'3,2,Отзыв,{admin.id},11,2019-09-24T21:08:21.567Z\n'
+        ))
+        result = CSVImporter(Review, reviews, chunk_size=2).run()
+        assert (result.accepted, result.rejected) == (2, 1)
+        assert Title.objects.get(pk=1).rating == 6, (
+            'Проверьте, что после загрузки отзывов пересчитывается рейтинг '
+            'произведений.'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            result = CSVImporter(Review, reviews, chunk_size=2).run()
+        assert not [
+            query for query in context.captured_queries
+            if query['sql'].startswith(
+                'SELECT COUNT(*) AS "__count" FROM "reviews_review"'
+            )
+        ], 'Проверьте, что загрузчик не пересчитывает строки всей таблицы.'
+        assert Review.objects.count() == 2, (
+            'Проверьте, что повторная загрузка файла не создаёт дубликатов.'
+        )
+        assert (result.accepted, result.skipped, result.rejected) == (
+            0, 2, 1
+        ), (
+            'Проверьте, что пропущенные существующие строки не считаются '
+            'загруженными.'
+        )
+
+    def test_02_parallel_import_follows_dependencies(self, tmp_path):
+        models = {ProjectUser, Category, Genre, Title, GenreTitle, Review}
+        assert dependency_graph(models) == {
+            ProjectUser: set(),
+            Category: set(),
+            Genre: set(),
+            Title: {Category},
+            GenreTitle: {Genre, Title},
+            Review: {Title, ProjectUser},
+        }, (
+            'Проверьте, что граф зависимостей строится по внешним ключам '
+            'моделей.'
+        )
+
+        files = {
+            ProjectUser: self.write_csv(tmp_path, 'users.csv', (
+                'id,username,email,role,bio,first_name,last_name\n'
+                '100,reader,reader@yamdb.fake,user,,,\n'
+            )),
+            Category: self.write_csv(
+                tmp_path, 'category.csv', 'id,name,slug\n1,Фильм,movie\n'
+            ),
+            Genre: self.write_csv(
+                tmp_path, 'genre.csv', 'id,name,slug\n1,Драма,drama\n'
+            ),
+            Title: self.write_csv(
+                tmp_path, 'titles.csv',
+                'id,name,year,category\n1,Фильм,1994,1\n'
+            ),
+            GenreTitle: self.write_csv(
+                tmp_path, 'genre_title.csv', 'id,title_id,genre_id\n1,1,1\n'
+            ),
+            Review: self.write_csv(tmp_path, 'review.csv', (
+                'id,title_id,text,author,score,pub_date\n'
+                '1,1,Отзыв,100,7,2019-09-24T21:08:21.567Z\n'
+            )),
+            Comment: self.write_csv(tmp_path, 'comments.csv', (
+                'id,review_id,text,author,pub_date\n'
+                '1,1,Комментарий,100,2019-09-24T21:08:21.567Z\n'
+            )),
+        }
+        order = []
+        for model, result in import_files(files, workers=3, chunk_size=1):
+            assert not isinstance(result, Exception), result
+            assert result.rejected == 0, result.errors
+            order.append(model)
+        for model, parents in dependency_graph(set(files)).items():
+            assert all(
+                order.index(parent) < order.index(model) for parent in parents
+            ), (
+                'Проверьте, что файл загружается только после файлов, '
+                'на которые ссылаются его внешние ключи.'
+            )
+        assert Comment.objects.filter(review__title__genre__slug='drama')
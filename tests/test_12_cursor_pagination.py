@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12CursorPagination:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def test_01_reviews_cursor_pagination(self, client, admin_client,
+                                          django_user_model):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        authors = django_user_model.objects.bulk_create(
+            django_user_model(
+                username=f'author_{idx}', email=f'author_{idx}@yamdb.fake'
+            ) for idx in range(12)
+        )
+        for author in django_user_model.objects.filter(
+            username__startswith='author_'
+        ):
+            Review.objects.create(
+                title_id=title_id, author=author, text=author.username,
+                score=5
+            )
+        expected = list(
+            Review.objects.filter(title_id=title_id)
+            .order_by('pub_date', 'id').values_list('id', flat=True)
+        )
+        assert len(expected) == len(authors)
+
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title_id)
+        response = client.get(url)
+        assert 'count' in response.json(), (
+            'Проверьте, что по умолчанию для отзывов используется '
+            'постраничная пагинация.'
+        )
+
+        received = []
+        next_url = f'{url}?pagination=cursor'
+        while next_url:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(next_url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data
+            assert not any(
+                'COUNT(' in query['sql'].upper()
+                for query in context.captured_queries
+            ), (
+                'Проверьте, что курсорная пагинация не выполняет COUNT(*).'
+            )
+            received.extend(review['id'] for review in data['results'])
+            next_url = data['next']
+        assert received == expected, (
+            f'Проверьте, что `{self.REVIEWS_URL_TEMPLATE}?pagination=cursor` '
+            'отдаёт все отзывы по порядку (pub_date, id) без повторов.'
+        )
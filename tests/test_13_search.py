@@ -0,0 +1,77 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Review
+from tests.utils import create_comments, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13Search:
+
+    SEARCH_URL = '/api/v1/search/'
+
+    def search(self, client, **params):
+        response = client.get(self.SEARCH_URL, params)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.SEARCH_URL}` со строкой '
+            'поиска возвращает ответ со статусом 200.'
+        )
+        return response.json()
+
+    def test_01_search(self, client, admin_client, admin, user, user_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        response = client.get(self.SEARCH_URL)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что GET-запрос к `{self.SEARCH_URL}` без параметра '
+            '`q` возвращает ответ со статусом 400.'
+        )
+
+        data = self.search(client, q='терминатор')
+        assert data['count'] == 1
+        assert data['results'][0]['type'] == 'title'
+        assert data['results'][0]['id'] == titles[0]['id']
+        assert '<b>Терминатор</b>' in data['results'][0]['snippet'], (
+            'Проверьте, что в результатах поиска найденные слова выделяются.'
+        )
+
+        data = self.search(client, q='number', type='comment')
+        assert data['count'] == len(comments)
+        assert {result['review_id'] for result in data['results']} == {
+            reviews[0]['id']
+        }
+        data = self.search(client, q='review numb')
+        assert data['count'] == len(reviews), (
+            'Проверьте, что поиск находит слова по префиксу.'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            data={'name': 'Вспомнить всё'}
+        )
+        assert self.search(client, q='терминатор')['count'] == 0
+        assert self.search(client, q='вспомнить')['count'] == 1, (
+            'Проверьте, что индекс поиска обновляется при изменении '
+            'произведения.'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert self.search(client, q='number')['count'] == 0, (
+            'Проверьте, что при удалении произведения из индекса поиска '
+            'удаляются его отзывы и комментарии.'
+        )
+
+    def test_02_snippet_is_escaped(self, client, admin_client, user):
+        titles, _, _ = create_titles(admin_client)
+        Review.objects.create(
+            title_id=titles[0]['id'], author=user, score=5,
+            text='<img src=x onerror=alert(1)> подозрительный отзыв',
+        )
+        snippet = self.search(client, q='подозрительный')['results'][0][
+            'snippet'
+        ]
+        assert '<img' not in snippet and '&lt;img' in snippet, (
+            'Проверьте, что HTML в тексте фрагмента экранируется.'
+        )
+        assert '<b>подозрительный</b>' in snippet
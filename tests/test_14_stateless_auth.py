@@ -0,0 +1,129 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api_yamdb.constants import SHARED_CACHE
+from api_yamdb.shared_cache import check_shared_cache, get_shared_cache
+from users.tokens import UserAccessToken, token_versions
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {UserAccessToken.for_user(user)}'
+    )
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14StatelessAuth:
+
+    CATEGORY_URL = '/api/v1/categories/'
+    USERS_URL = '/api/v1/users/'
+
+    def test_01_no_users_query(self, admin):
+        client = client_for(admin)
+        client.get(self.CATEGORY_URL)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                self.CATEGORY_URL, data={'name': 'Фильм', 'slug': 'films'}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert not any(
+            'users_projectuser' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что пользователь с токеном, содержащим роль и '
+            'версию, аутентифицируется без запроса к таблице '
+            'пользователей, когда его версия уже в кеше.'
+        )
+
+    def test_02_role_change_revokes_token(self, admin):
+        client = client_for(admin)
+        assert client.get(self.USERS_URL).status_code == HTTPStatus.OK
+        admin.role = 'user'
+        admin.save()
+        response = client.get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что после смены роли ранее выданный токен '
+            'перестаёт приниматься.'
+        )
+        response = client_for(admin).get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что новый токен содержит актуальную роль.'
+        )
+
+    def test_03_deactivation_and_deletion_revoke_token(self, user, moderator):
+        client = client_for(user)
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        response = client.get(f'{self.USERS_URL}me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что после блокировки пользователя его токен '
+            'перестаёт приниматься.'
+        )
+
+        client = client_for(moderator)
+        moderator.delete()
+        response = client.get(f'{self.USERS_URL}me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен удалённого пользователя не принимается.'
+        )
+
+    def test_04_unrelated_change_keeps_token(self, user):
+        client = client_for(user)
+        response = client.patch(f'{self.USERS_URL}me/', data={'bio': 'Новое'})
+        assert response.status_code == HTTPStatus.OK
+        response = client.get(f'{self.USERS_URL}me/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['bio'] == 'Новое', (
+            'Проверьте, что изменение профиля без смены роли не отзывает '
+            'токен.'
+        )
+
+    def test_05_revocation_survives_cache_eviction(self, admin):
+        client = client_for(admin)
+        assert client.get(self.USERS_URL).status_code == HTTPStatus.OK
+        admin.role = 'user'
+        admin.save()
+        # Запись вытеснена из общего кеша или не видна процессу.
+        caches[SHARED_CACHE].clear()
+        token_versions.clear()
+        response = client.get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что при отсутствии версии в кеше она читается из '
+            'базы и отозванный токен не принимается.'
+        )
+        token_versions.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        assert not any(
+            'users_projectuser' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что прочитанная из базы версия сохраняется в общем '
+            'кеше.'
+        )
+
+    def test_06_process_local_cache_rejected(self, settings):
+        assert check_shared_cache(None) == []
+        settings.CACHES = {
+            **settings.CACHES,
+            SHARED_CACHE: {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+            },
+        }
+        assert [error.id for error in check_shared_cache(None)] == [
+            'api_yamdb.E001'
+        ], (
+            'Проверьте, что кеш в памяти процесса для версий токенов '
+            'отклоняется проверкой настроек.'
+        )
+        with pytest.raises(ImproperlyConfigured):
+            get_shared_cache()
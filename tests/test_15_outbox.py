@@ -0,0 +1,102 @@
+from contextlib import nullcontext
+from datetime import timedelta
+from smtplib import SMTPException
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from users import outbox
+from users.models import OutboxMessage
+from users.outbox import enqueue_mail, outbox_metrics
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15Outbox:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    def test_01_signup_is_delivered_by_worker(self, client, settings):
+        settings.OUTBOX_EAGER = False
+        outbox_before_count = len(mail.outbox)
+        response = client.post(self.URL_SIGNUP, data={
+            'email': 'valid@yamdb.fake', 'username': 'valid_username'
+        })
+        assert response.status_code == 200
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что регистрация не отправляет письмо в запросе, '
+            'а ставит его в очередь.'
+        )
+        assert outbox_metrics()['pending'] == 1
+
+        call_command('send_outbox', '--once', '--workers', '2')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что команда `send_outbox` отправляет письма из '
+            'очереди.'
+        )
+        assert mail.outbox[-1].to == ['valid@yamdb.fake']
+        message = OutboxMessage.objects.get()
+        assert message.status == OutboxMessage.SENT
+        assert message.delivery_seconds is not None
+        metrics = outbox_metrics()
+        assert metrics['pending'] == 0
+        assert metrics['sent_recently'] == 1
+
+    def test_02_failed_delivery_is_retried(self, settings, monkeypatch):
+        settings.OUTBOX_EAGER = False
+        settings.OUTBOX_MAX_ATTEMPTS = 2
+
+        def fail(self, messages):
+            raise SMTPException('Сервер недоступен')
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', fail)
+        message = enqueue_mail('Тема', 'Текст', 'user@yamdb.fake')
+        call_command('send_outbox', '--once')
+        message.refresh_from_db()
+        assert message.status == OutboxMessage.PENDING
+        assert message.attempts == 1
+        assert message.next_attempt_at > timezone.now(), (
+            'Проверьте, что неудачная отправка откладывается с задержкой.'
+        )
+        assert 'Сервер недоступен' in message.last_error
+
+        OutboxMessage.objects.update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        call_command('send_outbox', '--once')
+        message.refresh_from_db()
+        assert message.status == OutboxMessage.FAILED, (
+            'Проверьте, что после OUTBOX_MAX_ATTEMPTS попыток письмо '
+            'помечается как недоставленное.'
+        )
+        assert outbox_metrics()['failed'] == 1
+
+    def test_03_concurrent_claims_do_not_overlap(self, settings,
+                                                 monkeypatch):
+        settings.OUTBOX_EAGER = False
+        for idx in range(3):
+            enqueue_mail('Тема', 'Текст', f'user_{idx}@yamdb.fake')
+        # Другой процесс забирает письма между выборкой и UPDATE этого.
+        ready_ids = outbox._ready_ids
+        other = []
+
+        def race(now, size):
+            ids = ready_ids(now, size)
+            monkeypatch.setattr(outbox, '_ready_ids', ready_ids)
+            other.extend(outbox.claim_batch(2))
+            return ids
+
+        monkeypatch.setattr(outbox, '_db_lock', nullcontext)
+        monkeypatch.setattr(outbox, '_ready_ids', race)
+        claimed = outbox.claim_batch(3)
+        other_ids = {message.pk for message in other}
+        claimed_ids = {message.pk for message in claimed}
+        assert len(other_ids) == 2 and len(claimed_ids) == 1, (
+            'Проверьте, что письмо, забранное другим воркером, повторно не '
+            'забирается.'
+        )
+        assert other_ids | claimed_ids == set(
+            OutboxMessage.objects.values_list('pk', flat=True)
+        )
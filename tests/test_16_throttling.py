@@ -0,0 +1,170 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.throttling import (
+    CacheThrottleStore, MemoryThrottleStore, SlidingWindowThrottle
+)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16Throttling:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+
+    @pytest.mark.parametrize('store', [
+        'api.throttling.MemoryThrottleStore',
+        'api.throttling.CacheThrottleStore',
+    ])
+    def test_01_signup_identity_limit(self, client, settings, store):
+        settings.AUTH_THROTTLE_STORE = store
+        settings.AUTH_THROTTLE_RATES = {
+            **settings.AUTH_THROTTLE_RATES, 'signup_identity': '2/min'
+        }
+        data = {'username': 'valid_username', 'email': 'valid@yamdb.fake'}
+        for _ in range(2):
+            response = client.post(self.URL_SIGNUP, data=data)
+            assert response.status_code == HTTPStatus.OK
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.URL_SIGNUP, data={
+                'username': 'other_username', 'email': data['email']
+            })
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что повторные запросы к `{self.URL_SIGNUP}` с тем '
+            'же email ограничиваются.'
+        )
+        assert response.get('Retry-After')
+        assert not any(
+            'users_projectuser' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что ограниченный запрос отклоняется без обращения '
+            'к таблице пользователей.'
+        )
+        response = client.post(self.URL_SIGNUP, data={
+            'username': 'other_username', 'email': 'other@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.OK
+
+    def test_02_token_ip_limit(self, client, settings):
+        settings.AUTH_THROTTLE_RATES = {
+            **settings.AUTH_THROTTLE_RATES, 'token_ip': '3/min'
+        }
+        for idx in range(3):
+            response = client.post(self.URL_TOKEN, data={
+                'username': f'user_{idx}', 'confirmation_code': '12345'
+            })
+            assert response.status_code == HTTPStatus.NOT_FOUND
+        response = client.post(self.URL_TOKEN, data={
+            'username': 'user_4', 'confirmation_code': '12345'
+        })
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что запросы к `{self.URL_TOKEN}` с одного IP '
+            'ограничиваются независимо от username.'
+        )
+
+    def test_03_sliding_window_estimate(self, settings):
+        settings.AUTH_THROTTLE_RATES = {'test': '10/min'}
+
+        class Throttle(SlidingWindowThrottle):
+            scope = 'test'
+
+            def get_idents(self, request):
+                return ['client']
+
+        throttle = Throttle()
+        throttle.timer = lambda: 60 * 100 + 50
+        for _ in range(10):
+            assert throttle.allow_request(None, None)
+        assert not throttle.allow_request(None, None)
+
+        # В середине следующего окна учитывается половина прошлых
+        # запросов, поэтому доступно ещё 5.
+        throttle.timer = lambda: 60 * 101 + 30
+        allowed = sum(throttle.allow_request(None, None) for _ in range(10))
+        assert allowed == 5, (
+            'Проверьте, что лимит считается по скользящему окну.'
+        )
+        assert 0 < throttle.wait() <= 60
+
+    def test_04_forwarded_for_is_not_trusted(self, client, settings):
+        settings.AUTH_THROTTLE_RATES = {
+            **settings.AUTH_THROTTLE_RATES, 'token_ip': '3/min'
+        }
+        data = {'username': 'user', 'confirmation_code': '12345'}
+        for idx in range(3):
+            response = client.post(
+                self.URL_TOKEN, data=data,
+                HTTP_X_FORWARDED_FOR=f'10.0.0.{idx}'
+            )
+            assert response.status_code == HTTPStatus.NOT_FOUND
+        response = client.post(
+            self.URL_TOKEN, data=data, HTTP_X_FORWARDED_FOR='10.0.0.99'
+        )
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что без доверенных прокси подделанный заголовок '
+            'X-Forwarded-For не сбрасывает лимит запросов по IP.'
+        )
+
+        settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        response = client.post(
+            self.URL_TOKEN, data=data,
+            HTTP_X_FORWARDED_FOR='10.0.0.99, 192.168.0.1'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что за доверенным прокси клиент определяется по '
+            'адресу, который добавил прокси.'
+        )
+
+    def test_05_cache_counters_keep_window_timeout(self):
+        store = CacheThrottleStore()
+        for _ in range(3):
+            assert store.incr('throttle:test:client:1', 3600) in (1, 2, 3)
+        assert store.get_many(['throttle:test:client:1']) == {
+            'throttle:test:client:1': 3
+        }
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT expires FROM shared_cache')
+            expires, = cursor.fetchone()
+        minimum = timezone.now() + timedelta(minutes=50)
+        assert expires > minimum.replace(tzinfo=None), (
+            'Проверьте, что увеличение счётчика не сокращает срок его '
+            'хранения.'
+        )
+
+    def test_06_local_counters_reject_bursts(self, client, settings):
+        settings.AUTH_THROTTLE_STORE = 'api.throttling.CacheThrottleStore'
+        settings.AUTH_THROTTLE_RATES = {
+            **settings.AUTH_THROTTLE_RATES, 'token_ip': '3/min'
+        }
+        data = {'username': 'user', 'confirmation_code': '12345'}
+        for _ in range(3):
+            response = client.post(self.URL_TOKEN, data=data)
+            assert response.status_code == HTTPStatus.NOT_FOUND
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.URL_TOKEN, data=data)
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+        assert not context.captured_queries, (
+            'Проверьте, что повтор, превысивший лимит в этом же процессе, '
+            'отклоняется по счётчикам процесса без обращения к БД.'
+        )
+
+    def test_07_memory_store_is_bounded(self):
+        store = MemoryThrottleStore()
+        store.max_entries = 3
+        store.incr('expired', -1)
+        for idx in range(3):
+            store.incr(f'key:{idx}', 60)
+        assert set(store.get_many(['key:0', 'key:1', 'key:2']).values()) == {
+            1
+        }
+        assert 'expired' not in store._counters, (
+            'Проверьте, что истёкшие счётчики удаляются при переполнении.'
+        )
+        store.incr('key:3', 60)
+        assert len(store._counters) <= store.max_entries
@@ -0,0 +1,117 @@
+from http import HTTPStatus
+
+from io import StringIO
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from tests.fixtures.fixture_cache import clear_caches
+from users.models import UsedRefreshToken
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17TokenRefresh:
+
+    URL_TOKEN = '/api/v1/auth/token/'
+    URL_REFRESH = '/api/v1/auth/token/refresh/'
+    URL_ME = '/api/v1/users/me/'
+
+    def obtain(self, client, user):
+        response = client.post(self.URL_TOKEN, data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        })
+        assert response.status_code == HTTPStatus.OK
+        return response.json()
+
+    def test_01_token_endpoint_issues_tokens(self, client, user):
+        tokens = self.obtain(client, user)
+        assert set(tokens) == {'token', 'refresh'}, (
+            f'Проверьте, что POST-запрос к `{self.URL_TOKEN}` с верным кодом '
+            'возвращает access- и refresh-токены.'
+        )
+        api_client = APIClient()
+        api_client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["token"]}')
+        response = api_client.get(self.URL_ME)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['username'] == user.username
+
+    def test_02_refresh_rotates_and_blacklists(self, client, user):
+        tokens = self.obtain(client, user)
+        response = client.post(
+            self.URL_REFRESH, data={'refresh': tokens['refresh']}
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{self.URL_REFRESH}` выдаёт новые токены.'
+        )
+        rotated = response.json()
+        assert rotated['refresh'] != tokens['refresh']
+        assert rotated['token'] != tokens['token']
+
+        response = client.post(
+            self.URL_REFRESH, data={'refresh': tokens['refresh']}
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что использованный refresh-токен повторно не '
+            'принимается.'
+        )
+        response = client.post(
+            self.URL_REFRESH, data={'refresh': rotated['refresh']}
+        )
+        assert response.status_code == HTTPStatus.OK
+
+    def test_03_refresh_rejected_after_role_change(self, client, user):
+        tokens = self.obtain(client, user)
+        user.role = 'moderator'
+        user.save()
+        response = client.post(
+            self.URL_REFRESH, data={'refresh': tokens['refresh']}
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что после смены роли refresh-токен отзывается.'
+        )
+
+    def test_04_refresh_invalid_data(self, client, user):
+        response = client.post(self.URL_REFRESH)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.post(self.URL_REFRESH, data={'refresh': 'invalid'})
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        tokens = self.obtain(client, user)
+        response = client.post(
+            self.URL_REFRESH, data={'refresh': tokens['token']}
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что access-токен нельзя использовать для '
+            'обновления.'
+        )
+
+    def test_05_used_tokens_are_stored_durably(self, client, user):
+        tokens = self.obtain(client, user)
+        response = client.post(
+            self.URL_REFRESH, data={'refresh': tokens['refresh']}
+        )
+        assert response.status_code == HTTPStatus.OK
+        # Кеши другого процесса или вытесненные записи.
+        clear_caches(with_db=True)
+        response = client.post(
+            self.URL_REFRESH, data={'refresh': tokens['refresh']}
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что использованный refresh-токен отклоняется и '
+            'после очистки кеша.'
+        )
+
+        UsedRefreshToken.objects.create(
+            jti='expired', expires_at=timezone.now()
+        )
+        assert UsedRefreshToken.objects.count() == 2
+        call_command('clear_used_tokens', stdout=StringIO())
+        assert not UsedRefreshToken.objects.filter(
+            jti='expired'
+        ).exists() and UsedRefreshToken.objects.count() == 1, (
+            'Проверьте, что `clear_used_tokens` удаляет только записи '
+            'истёкших токенов.'
+        )
@@ -0,0 +1,93 @@
+import json
+import re
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_titles
+
+TIMING = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) queries")?')
+
+
+def parse_server_timing(header):
+    return {
+        name: (float(duration), queries)
+        for name, duration, queries in TIMING.findall(header)
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18RequestMetrics:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    @pytest.fixture(autouse=True)
+    def sample_all(self, settings):
+        settings.REQUEST_METRICS_SAMPLE_RATE = 1.0
+
+    def test_01_server_timing_header(self, client, admin_client, settings):
+        create_titles(admin_client)
+        response = client.get(self.TITLES_URL)
+        assert not response.has_header('Server-Timing'), (
+            'Проверьте, что заголовок `Server-Timing` с данными о SQL не '
+            'отдаётся клиентам, если не включён DEBUG.'
+        )
+        settings.DEBUG = True
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.TITLES_URL)
+        header = response.get('Server-Timing')
+        assert header, (
+            'Проверьте, что ответ содержит заголовок `Server-Timing`.'
+        )
+        timing = parse_server_timing(header)
+        assert set(timing) == {'db', 'serializer', 'view', 'total'}
+        assert int(timing['db'][1]) == len(context.captured_queries), (
+            'Проверьте, что `Server-Timing` содержит число SQL-запросов.'
+        )
+        assert timing['serializer'][0] > 0
+        assert timing['total'][0] >= timing['view'][0] >= timing['db'][0]
+
+    def test_02_structured_log(self, client, admin_client, settings,
+                               caplog):
+        create_titles(admin_client)
+        settings.REQUEST_METRICS_SQL_THRESHOLD_MS = 10 ** 6
+        with caplog.at_level('INFO', logger='api.requests'):
+            client.get(self.TITLES_URL)
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['route'] == 'titles-list'
+        assert record['status'] == 200
+        assert record['queries'] > 0
+        assert 'sql' not in record, (
+            'Проверьте, что SQL пишется в лог только для медленных запросов.'
+        )
+
+        settings.REQUEST_METRICS_SQL_THRESHOLD_MS = 0
+        with caplog.at_level('INFO', logger='api.requests'):
+            client.get(self.TITLES_URL)
+        record = json.loads(caplog.records[-1].getMessage())
+        assert len(record['sql']) == record['queries'], (
+            'Проверьте, что при превышении порога в лог пишется весь SQL '
+            'запроса.'
+        )
+
+    def test_03_sampling(self, client, settings):
+        settings.DEBUG = True
+        settings.REQUEST_METRICS_SAMPLE_RATE = 0
+        response = client.get(self.TITLES_URL)
+        assert not response.has_header('Server-Timing'), (
+            'Проверьте, что метрики не собираются для запросов вне выборки.'
+        )
+
+    def test_04_every_response_is_timed(self, client, settings):
+        settings.DEBUG = True
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'timed', 'email': 'timed@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.OK
+        timing = parse_server_timing(response['Server-Timing'])
+        assert timing['serializer'][0] > 0, (
+            'Проверьте, что время сериализации учитывается для ответов '
+            'всех эндпоинтов.'
+        )
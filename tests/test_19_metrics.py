@@ -0,0 +1,125 @@
+import re
+from http import HTTPStatus
+
+import pytest
+
+from api_yamdb.metrics import (
+    Histogram, SharedCounter, SharedHistogram, observe_import
+)
+from reviews.importer import ImportResult
+from reviews.models import Title
+from tests.utils import create_categories
+from users.outbox import deliveries_total
+
+SAMPLE = re.compile(r'^(\w+)(\{[^}]*\})? (\S+)$')
+
+
+def parse_metrics(text):
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith('#') or not line:
+            continue
+        match = SAMPLE.match(line)
+        assert match, f'Некорректная строка метрик: {line}'
+        name, labels, value = match.groups()
+        samples[name + (labels or '')] = float(value)
+    return samples
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19Metrics:
+
+    URL = '/metrics'
+    CATEGORY_URL = '/api/v1/categories/'
+
+    def test_01_metrics_endpoint(self, client, admin_client, settings):
+        settings.DEBUG = True
+        create_categories(admin_client)
+        before = parse_metrics(client.get(self.URL).content.decode())
+        hits_key = (
+            'api_response_cache_total{namespace="category",result="hit"}'
+        )
+        requests_key = (
+            'http_requests_total{route="categories-list",method="GET",'
+            'status="200"}'
+        )
+        client.get(self.CATEGORY_URL)
+        client.get(self.CATEGORY_URL)
+
+        response = client.get(self.URL)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что эндпоинт `{self.URL}` доступен.'
+        )
+        assert response['Content-Type'].startswith('text/plain')
+        after = parse_metrics(response.content.decode())
+        assert after[requests_key] - before.get(requests_key, 0) == 2, (
+            'Проверьте, что запросы учитываются по имени маршрута.'
+        )
+        assert after[hits_key] - before.get(hits_key, 0) == 1, (
+            'Проверьте, что учитываются попадания в кеш ответов.'
+        )
+        assert (
+            'http_request_db_queries_count{route="categories-list"}' in after
+        )
+        assert 'outbox_pending_messages' in after
+
+    def test_02_metrics_token(self, client, settings):
+        settings.METRICS_TOKEN = 'secret'
+        response = client.get(self.URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+        response = client.get(self.URL, HTTP_AUTHORIZATION='Bearer secret')
+        assert response.status_code == HTTPStatus.OK
+
+        settings.METRICS_TOKEN = None
+        response = client.get(self.URL)
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            f'Проверьте, что без METRICS_TOKEN эндпоинт `{self.URL}` закрыт, '
+            'если не включён DEBUG.'
+        )
+
+    def test_03_command_metrics_are_shared(self, client, settings):
+        settings.DEBUG = True
+        result = ImportResult('titles.csv')
+        result.rows, result.accepted, result.rejected = 5, 4, 1
+        result.finished = result.started + 2
+        observe_import(Title, result)
+        deliveries_total.inc(3, result='sent')
+
+        # Новые метрики с теми же именами - как в другом процессе.
+        jobs = SharedCounter(
+            'import_jobs', 'Загрузки CSV-файлов.', ('model', 'status')
+        )
+        assert list(jobs.samples()) == [(
+            'import_jobs_total', '{model="reviews.Title",status="ok"}', 1
+        )], (
+            'Проверьте, что итоги загрузок CSV хранятся в общем кеше, а не '
+            'в памяти процесса команды.'
+        )
+        duration = SharedHistogram(
+            'import_duration_seconds', 'Время загрузки.', ('model',), (1, 5)
+        )
+        lines = duration.render()
+        labels = '{model="reviews.Title",le="5.0"}'
+        assert f'import_duration_seconds_bucket{labels} 1' in lines
+        labels = '{model="reviews.Title"}'
+        assert f'import_duration_seconds_sum{labels} 2.0' in lines
+
+        samples = parse_metrics(client.get(self.URL).content.decode())
+        assert samples[
+            'import_rows_total{model="reviews.Title",result="accepted"}'
+        ] == 4
+        assert samples['outbox_deliveries_total{result="sent"}'] == 3, (
+            'Проверьте, что `/metrics` выгружает число отправленных писем, '
+            'учтённое командой send_outbox.'
+        )
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('test_seconds', 'Тест.', ('route',), (0.1, 1))
+    for value in (0.05, 0.5, 0.7, 5):
+        histogram.observe(value, route='a')
+    lines = histogram.render()
+    assert 'test_seconds_bucket{route="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="a",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{route="a",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{route="a"} 4' in lines
@@ -0,0 +1,221 @@
+import time
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review
+from tests.utils import app_queries, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20ConditionalGet:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL = '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+
+    def assert_not_modified(self, client, url, **headers):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, **headers)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным валидатором '
+            'возвращает ответ со статусом 304.'
+        )
+        assert not app_queries(context), (
+            'Проверьте, что ответ 304 формируется без запросов к БД.'
+        )
+        assert not response.content
+
+    def test_01_titles_etag(self, client, admin_client, user):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get(self.TITLES_URL)
+        etag = response.get('ETag')
+        assert etag, (
+            f'Проверьте, что ответ на GET-запрос к `{self.TITLES_URL}` '
+            'содержит заголовок `ETag`.'
+        )
+        self.assert_not_modified(
+            client, self.TITLES_URL, HTTP_IF_NONE_MATCH=etag
+        )
+        detail_url = f'{self.TITLES_URL}{titles[0]["id"]}/'
+        detail_etag = client.get(detail_url)['ETag']
+        assert detail_etag != etag
+        self.assert_not_modified(
+            client, detail_url, HTTP_IF_NONE_MATCH=detail_etag
+        )
+
+        Review.objects.create(
+            title_id=titles[0]['id'], author=user, text='Текст', score=7
+        )
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый отзыв (и рейтинг) делает ETag '
+            'произведения неактуальным.'
+        )
+        assert response.json()['rating'] == 7
+
+    def test_02_reviews_and_comments(self, client, admin_client, user,
+                                     moderator):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = Review.objects.create(
+            title_id=title_id, author=user, text='Текст', score=5
+        )
+        reviews_url = self.REVIEWS_URL.format(title_id=title_id)
+        comments_url = self.COMMENTS_URL.format(
+            title_id=title_id, review_id=review.pk
+        )
+        reviews_etag = client.get(reviews_url)['ETag']
+        comments_etag = client.get(comments_url)['ETag']
+        self.assert_not_modified(
+            client, reviews_url, HTTP_IF_NONE_MATCH=reviews_etag
+        )
+
+        Comment.objects.create(review=review, author=moderator, text='Да')
+        self.assert_not_modified(
+            client, reviews_url, HTTP_IF_NONE_MATCH=reviews_etag
+        )
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=comments_etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый комментарий делает ETag списка '
+            'комментариев неактуальным.'
+        )
+        assert response.json()['count'] == 1
+
+        Review.objects.create(
+            title_id=title_id, author=moderator, text='Ещё', score=3
+        )
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=reviews_etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] == 2
+
+    def test_03_if_modified_since(self, client, admin_client, user):
+        titles, _, _ = create_titles(admin_client)
+        reviews_url = self.REVIEWS_URL.format(title_id=titles[0]['id'])
+        client.get(reviews_url)
+        # Пока не прошла секунда последнего изменения, Last-Modified не
+        # отдаётся.
+        time.sleep(1.1)
+        last_modified = client.get(reviews_url).get('Last-Modified')
+        assert last_modified, (
+            f'Проверьте, что ответ на GET-запрос к `{reviews_url}` '
+            'содержит заголовок `Last-Modified`.'
+        )
+        self.assert_not_modified(
+            client, reviews_url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        Review.objects.create(
+            title_id=titles[0]['id'], author=user, text='Текст', score=5
+        )
+        response = client.get(
+            reviews_url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после изменения отзывов `If-Modified-Since` '
+            'с прежней датой не даёт ответа 304.'
+        )
+
+    def test_04_if_none_match_star(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        for url in (f'{self.TITLES_URL}0/',
+                    self.REVIEWS_URL.format(title_id=0)):
+            response = client.get(url, HTTP_IF_NONE_MATCH='*')
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что GET-запрос к `{url}` с `If-None-Match: *` '
+                'для несуществующего ресурса возвращает ответ со статусом '
+                '404.'
+            )
+        for url in (f'{self.TITLES_URL}{titles[0]["id"]}/',
+                    self.REVIEWS_URL.format(title_id=titles[0]['id'])):
+            response = client.get(url, HTTP_IF_NONE_MATCH='*')
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{url}` с `If-None-Match: *` '
+                'для существующего ресурса возвращает ответ со статусом 304.'
+            )
+            assert response.get('ETag')
+
+    def test_05_only_username_change_invalidates(self, client, admin_client,
+                                                 user, user_client):
+        titles, _, _ = create_titles(admin_client)
+        Review.objects.create(
+            title_id=titles[0]['id'], author=user, text='Текст', score=5
+        )
+        reviews_url = self.REVIEWS_URL.format(title_id=titles[0]['id'])
+        etag = client.get(reviews_url)['ETag']
+        response = user_client.patch(
+            '/api/v1/users/me/', data={'bio': 'Новая биография'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        user.refresh_from_db()
+        user.role = 'moderator'
+        user.save()
+        self.assert_not_modified(client, reviews_url, HTTP_IF_NONE_MATCH=etag)
+
+        user.username = 'renamed'
+        user.save(update_fields=['username'])
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что смена имени автора делает ETag списка отзывов '
+            'неактуальным.'
+        )
+        assert response.json()['results'][0]['author'] == 'renamed'
+
+    def test_06_bulk_changes_invalidate(self, client, admin_client, user,
+                                        moderator):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        Review.objects.create(
+            title_id=title_id, author=user, text='Текст', score=5
+        )
+        detail_url = f'{self.TITLES_URL}{title_id}/'
+        reviews_url = self.REVIEWS_URL.format(title_id=title_id)
+        detail_etag = client.get(detail_url)['ETag']
+        reviews_etag = client.get(reviews_url)['ETag']
+
+        Review.objects.filter(title_id=title_id).update(score=10)
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что массовое изменение оценок делает ETag '
+            'произведения неактуальным.'
+        )
+        assert response.json()['rating'] == 10
+        detail_etag = response['ETag']
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=reviews_etag)
+        assert response.status_code == HTTPStatus.OK
+        reviews_etag = response['ETag']
+
+        Review.objects.filter(title_id=title_id).update(text='Новый текст')
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=reviews_etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что массовое изменение текста отзывов делает ETag '
+            'списка отзывов неактуальным.'
+        )
+        reviews_etag = response['ETag']
+        self.assert_not_modified(
+            client, detail_url, HTTP_IF_NONE_MATCH=detail_etag
+        )
+
+        Review.objects.bulk_create([Review(
+            title_id=title_id, author=moderator, text='Текст', score=2
+        )])
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что массовое добавление отзывов делает ETag '
+            'произведения неактуальным.'
+        )
+        assert response.json()['rating'] == 6
+        detail_etag = response['ETag']
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=reviews_etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['count'] == 2
+
+        call_command('recount_ratings', stdout=StringIO())
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что команды пересчёта делают ETag произведений '
+            'неактуальными.'
+        )
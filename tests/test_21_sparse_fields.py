@@ -0,0 +1,78 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import app_queries, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21SparseFields:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def get(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        return response.json(), [
+            query['sql'] for query in app_queries(context)
+        ]
+
+    def test_01_fields(self, client, admin_client):
+        create_titles(admin_client)
+        url = f'{self.TITLES_URL}?fields=id,name,rating'
+        data, queries = self.get(client, url)
+        assert [set(title) for title in data['results']] == [
+            {'id', 'name', 'rating'}
+        ] * 2, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает только '
+            'перечисленные в `fields` поля.'
+        )
+        assert data['results'][0]['name'] == 'Крепкий орешек'
+        assert not any('description' in sql for sql in queries), (
+            'Проверьте, что поля, не вошедшие в `fields`, не загружаются '
+            'из БД.'
+        )
+        relation_sql = [
+            sql for sql in queries if 'genre' in sql or 'category' in sql
+        ]
+        assert not relation_sql, (
+            'Проверьте, что для связей, не вошедших в `fields`, не '
+            'выполняются JOIN и prefetch.'
+        )
+
+    def test_02_expand(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        detail_url = f'{self.TITLES_URL}{titles[0]["id"]}/'
+        data, _ = self.get(client, f'{detail_url}?expand=category')
+        assert data['category'] == categories[0], (
+            'Проверьте, что связь из `expand` отдаётся вложенным объектом.'
+        )
+        assert sorted(data['genre']) == ['comedy', 'horror'], (
+            'Проверьте, что связь, не вошедшая в `expand`, отдаётся '
+            'списком slug.'
+        )
+        assert data['description'] == titles[0]['description']
+
+        data, _ = self.get(client, f'{detail_url}?fields=name,genre&expand=')
+        assert data == {
+            'name': titles[0]['name'],
+            'genre': ['comedy', 'horror'],
+        }
+
+        data, _ = self.get(client, detail_url)
+        assert genres[0] in data['genre'], (
+            'Проверьте, что без `expand` все связи раскрываются.'
+        )
+
+    def test_03_unknown_fields(self, client, admin_client):
+        create_titles(admin_client)
+        for query in ('fields=id,password', 'expand=name'):
+            url = f'{self.TITLES_URL}?{query}'
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что GET-запрос к `{url}` с неизвестным полем '
+                'возвращает ответ со статусом 400.'
+            )
@@ -0,0 +1,95 @@
+import datetime as dt
+import io
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+from api.serializers import FiniteFloatField
+from tests.utils import create_titles
+
+DATA = {
+    'name': 'Произведение\u2028с разделителем',
+    'created': dt.datetime(
+        2024, 8, 23, 14, 29, 5, 120000, tzinfo=dt.timezone.utc
+    ),
+    'date': dt.date(2024, 8, 23),
+    'price': Decimal('9.90'),
+    'lazy': gettext_lazy('Рейтинг'),
+    'nested': [{'id': 1, 'rating': None, 'score': 7.5}],
+    'flag': True,
+}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22JsonRenderer:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_renderer_matches_drf(self, client, admin_client):
+        renderer = renderers.FastJSONRenderer()
+        assert renderer.render(DATA) == JSONRenderer().render(DATA), (
+            'Проверьте, что FastJSONRenderer кодирует данные так же, как '
+            'JSONRenderer.'
+        )
+        assert renderer.render(None) == b''
+
+        create_titles(admin_client)
+        response = client.get(self.TITLES_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.content == JSONRenderer().render(response.json())
+
+    def test_02_fallback(self, monkeypatch):
+        expected = JSONRenderer().render(DATA)
+        monkeypatch.setattr(renderers, 'orjson', None)
+        assert renderers.FastJSONRenderer().render(DATA) == expected, (
+            'Проверьте, что без orjson FastJSONRenderer работает как '
+            'JSONRenderer.'
+        )
+        body = b'{"name": "\xd0\x96\xd0\xb0\xd0\xbd\xd1\x80"}'
+        assert renderers.FastJSONParser().parse(io.BytesIO(body)) == (
+            JSONParser().parse(io.BytesIO(body))
+        )
+
+    def test_03_parser(self, admin_client):
+        parser = renderers.FastJSONParser()
+        assert parser.parse(io.BytesIO('{"slug": "ж"}'.encode())) == {
+            'slug': 'ж'
+        }
+        for body in (b'{"slug": ', b'{"score": NaN}'):
+            with pytest.raises(ParseError):
+                parser.parse(io.BytesIO(body))
+
+        response = admin_client.post(
+            '/api/v1/genres/', data='{"name": "Драма", "slug": "drama"}',
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        response = admin_client.post(
+            '/api/v1/genres/', data='{"name": ',
+            content_type='application/json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что запрос с некорректным JSON возвращает ответ '
+            'со статусом 400.'
+        )
+
+    def test_04_unsupported_values(self):
+        renderer = renderers.FastJSONRenderer()
+        data = {'big': 2 ** 70, 'small': -2 ** 70, 'score': None}
+        assert renderer.render(data) == JSONRenderer().render(data), (
+            'Проверьте, что FastJSONRenderer кодирует целые длиннее 64 бит '
+            'так же, как JSONRenderer.'
+        )
+        field = FiniteFloatField()
+        assert field.to_representation(7.25) == 7.25
+        for value in (float('nan'), float('inf'), float('-inf')):
+            with pytest.raises(ValueError):
+                JSONRenderer().render({'score': value})
+            with pytest.raises(ValueError):
+                field.to_representation(value)
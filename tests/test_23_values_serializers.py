@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+
+from api import views
+from reviews.models import Comment, Title
+from tests.benchmarks.dataset import seed_dataset
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23ValuesSerializers:
+
+    def assert_same_response(self, client, monkeypatch, viewset, urls):
+        fast = [client.get(url) for url in urls]
+        monkeypatch.setattr(viewset, 'values_serializer_class', None)
+        for url, response in zip(urls, fast):
+            expected = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            assert response.content == expected.content, (
+                f'Проверьте, что ответ на GET-запрос к `{url}` совпадает '
+                'с ответом обычного сериализатора байт в байт.'
+            )
+        monkeypatch.undo()
+
+    def test_01_titles(self, client, monkeypatch):
+        ids = seed_dataset(users=5, titles=12, reviews=30, comments=0)
+        Title.objects.create(name='Без категории и оценок', year=2000)
+        Title.objects.filter(pk=ids['titles'][0]).update(rating=7.6)
+        urls = [
+            '/api/v1/titles/',
+            '/api/v1/titles/?page=3',
+            '/api/v1/titles/?genre=bench-genre-1',
+            '/api/v1/titles/?ordering=-year',
+            '/api/v1/titles/?fields=id,name,rating',
+            '/api/v1/titles/?fields=category,genre&expand=category',
+            '/api/v1/titles/?expand=',
+        ]
+        self.assert_same_response(
+            client, monkeypatch, views.TitleViewSet, urls
+        )
+
+    def test_02_reviews_and_comments(self, client, monkeypatch):
+        ids = seed_dataset(users=8, titles=2, reviews=16, comments=40)
+        title_id = ids['titles'][0]
+        review = Comment.objects.filter(
+            review__title_id=title_id
+        ).first().review
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{review.pk}/comments/'
+        self.assert_same_response(
+            client, monkeypatch, views.ReviewViewSet,
+            [reviews_url, f'{reviews_url}?page=2',
+             f'{reviews_url}?pagination=cursor']
+        )
+        self.assert_same_response(
+            client, monkeypatch, views.CommentViewSet,
+            [comments_url, f'{comments_url}?pagination=cursor']
+        )
+        response = client.get(f'{reviews_url}?pagination=cursor')
+        next_page = client.get(response.json()['next'])
+        assert next_page.status_code == HTTPStatus.OK, (
+            'Проверьте, что курсорная пагинация работает с быстрым '
+            'сериализатором.'
+        )
@@ -0,0 +1,119 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import RatingHistogram, Review, Title
+from tests.benchmarks.dataset import seed_dataset
+from tests.utils import app_queries, create_titles
+
+
+def histogram(**counts):
+    return {str(score): counts.get(f's{score}', 0) for score in range(1, 11)}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24RatingStats:
+
+    URL_TEMPLATE = '/api/v1/titles/{title_id}/rating-stats/'
+
+    def get_stats(self, client, title_id):
+        url = self.URL_TEMPLATE.format(title_id=title_id)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        assert len(app_queries(context)) == 1, (
+            f'Проверьте, что GET-запрос к `{url}` читает гистограмму '
+            'одним запросом, без перебора отзывов.'
+        )
+        return response.json()
+
+    def test_01_stats(self, client, admin_client, user_client,
+                      moderator_client, admin):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        assert self.get_stats(client, title_id) == {
+            'count': 0, 'mean': None, 'median': None,
+            'histogram': histogram(),
+        }
+
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        review_ids = []
+        for author_client, score in ((user_client, 3), (moderator_client, 8),
+                                     (admin_client, 10)):
+            response = author_client.post(
+                reviews_url, data={'text': 'Отзыв', 'score': score}
+            )
+            assert response.status_code == HTTPStatus.CREATED
+            review_ids.append(response.json()['id'])
+        assert self.get_stats(client, title_id) == {
+            'count': 3, 'mean': 7.0, 'median': 8.0,
+            'histogram': histogram(s3=1, s8=1, s10=1),
+        }
+
+        response = admin_client.patch(
+            f'{reviews_url}{review_ids[2]}/', data={'score': 4}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = admin_client.delete(f'{reviews_url}{review_ids[1]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_stats(client, title_id) == {
+            'count': 2, 'mean': 3.5, 'median': 3.5,
+            'histogram': histogram(s3=1, s4=1),
+        }, (
+            'Проверьте, что гистограмма обновляется при изменении и '
+            'удалении отзывов.'
+        )
+
+        review = Review.objects.get(pk=review_ids[0])
+        review.title_id = titles[1]['id']
+        review.save()
+        assert self.get_stats(client, title_id)['histogram'] == (
+            histogram(s4=1)
+        )
+        assert self.get_stats(client, titles[1]['id'])['histogram'] == (
+            histogram(s3=1)
+        )
+
+        for title_id in (0, 'abc'):
+            url = self.URL_TEMPLATE.format(title_id=title_id)
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+                'статусом 404.'
+            )
+
+    def test_02_rebuild(self, client):
+        ids = seed_dataset(users=10, titles=5, reviews=40, comments=0)
+        expected = {
+            title_id: self.get_stats(client, title_id)
+            for title_id in ids['titles']
+        }
+        for title in Title.objects.all():
+            stats = expected[title.pk]
+            assert stats['count'] == title.rating_count, (
+                'Проверьте, что массовое создание отзывов обновляет '
+                'гистограммы.'
+            )
+            assert stats['mean'] == round(title.rating, 2)
+
+        RatingHistogram.objects.all().delete()
+        RatingHistogram.objects.create(title_id=ids['titles'][0], score_1=99)
+        with CaptureQueriesContext(connection) as context:
+            call_command('rebuild_histograms', stdout=StringIO())
+        review_queries = [
+            query for query in context.captured_queries
+            if 'FROM "reviews_review"' in query['sql']
+        ]
+        assert len(review_queries) == 1, (
+            'Проверьте, что `rebuild_histograms` читает отзывы одним '
+            'сгруппированным запросом.'
+        )
+        for title_id, stats in expected.items():
+            assert self.get_stats(client, title_id) == stats
@@ -0,0 +1,171 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import LeaderboardEntry, Review, Title
+from tests.benchmarks.dataset import seed_dataset
+from tests.utils import app_queries, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Leaderboards:
+
+    URL = '/api/v1/leaderboards/'
+
+    def get_ids(self, client, query=''):
+        response = client.get(f'{self.URL}{query}')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.URL}{query}` возвращает '
+            'ответ со статусом 200.'
+        )
+        return [title['id'] for title in response.json()['results']]
+
+    def test_01_weighted_ranking(self, client, admin_client,
+                                 django_user_model):
+        titles, _, _ = create_titles(admin_client)
+        terminator, die_hard = (title['id'] for title in titles)
+        authors = [
+            django_user_model.objects.create_user(
+                username=f'author_{idx}', email=f'author_{idx}@yamdb.fake'
+            ) for idx in range(5)
+        ]
+        Review.objects.create(
+            title_id=terminator, author=authors[0], text='Отзыв', score=10
+        )
+        for author in authors:
+            Review.objects.create(
+                title_id=die_hard, author=author, text='Отзыв', score=9
+            )
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Без отзывов', 'year': 1984, 'genre': ['horror'],
+            'category': 'films',
+        })
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.URL)
+        assert len(app_queries(context)) == 1, (
+            f'Проверьте, что GET-запрос к `{self.URL}` читает страницу '
+            'рейтинга одним запросом.'
+        )
+        results = response.json()['results']
+        assert [title['id'] for title in results] == [die_hard, terminator], (
+            'Проверьте, что произведение с одной высокой оценкой не '
+            'обгоняет произведение со многими оценками чуть ниже.'
+        )
+        assert results[0] == {
+            'id': die_hard, 'name': titles[1]['name'], 'year': 1988,
+            'rating': 9, 'votes': 5, 'weighted_rating': 6.67,
+        }
+
+        assert self.get_ids(client, '?genre=horror') == [terminator]
+        assert self.get_ids(client, '?genre=drama') == [die_hard]
+        assert self.get_ids(client, '?category=books') == [die_hard]
+        assert self.get_ids(client, '?year=1984') == [terminator]
+
+        response = admin_client.patch(
+            f'/api/v1/titles/{terminator}/', data={'genre': ['drama']}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_ids(client, '?genre=drama') == [die_hard, terminator]
+        assert self.get_ids(client, '?genre=horror') == [], (
+            'Проверьте, что рейтинги жанров обновляются при изменении '
+            'жанров произведения.'
+        )
+
+        for query, status in (('?year=old', HTTPStatus.BAD_REQUEST),
+                              ('?genre=drama&year=1984',
+                               HTTPStatus.BAD_REQUEST),
+                              ('?genre=unknown', HTTPStatus.NOT_FOUND)):
+            response = client.get(f'{self.URL}{query}')
+            assert response.status_code == status, (
+                f'Проверьте, что GET-запрос к `{self.URL}{query}` '
+                f'возвращает ответ со статусом {status}.'
+            )
+
+    def test_02_pages_and_rebuild(self, client):
+        seed_dataset(users=10, titles=12, reviews=60, comments=0)
+        ids = []
+        url = self.URL
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            ids += [title['id'] for title in response.json()['results']]
+            url = response.json()['next']
+        expected = list(
+            LeaderboardEntry.objects.filter(
+                board=LeaderboardEntry.GLOBAL
+            ).order_by('-score', 'title_id').values_list(
+                'title_id', flat=True
+            )
+        )
+        assert ids == expected
+        assert len(ids) == Title.objects.filter(rating_count__gt=0).count()
+
+        last = LeaderboardEntry.objects.filter(title_id=ids[-1])
+        score = last.first().score
+        review = Review.objects.filter(title_id=ids[-1], score__lt=10).first()
+        review.score = 10
+        review.save()
+        assert set(last.values_list('score', flat=True)) == {
+            last.first().score
+        }
+        assert last.first().score > score, (
+            'Проверьте, что изменение оценки сразу обновляет взвешенный '
+            'рейтинг произведения во всех рейтингах.'
+        )
+        LeaderboardEntry.objects.all().delete()
+        call_command('rebuild_leaderboards', stdout=StringIO())
+        assert self.get_ids(client) == list(
+            LeaderboardEntry.objects.filter(
+                board=LeaderboardEntry.GLOBAL
+            ).order_by('-score', 'title_id').values_list(
+                'title_id', flat=True
+            )[:5]
+        )
+        assert LeaderboardEntry.objects.filter(
+            board=LeaderboardEntry.YEAR
+        ).count() == Title.objects.count(), (
+            'Проверьте, что `rebuild_leaderboards` заново строит все '
+            'рейтинги.'
+        )
+
+    def test_03_title_edits(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        entries = LeaderboardEntry.objects.filter(title_id=title_id)
+        before = set(entries.values_list('id', 'board', 'key'))
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.patch(
+                f'/api/v1/titles/{title_id}/',
+                data={'name': 'Новое название', 'description': 'Текст'}
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert not any(
+            query['sql'].startswith(('DELETE', 'INSERT'))
+            and 'reviews_leaderboardentry' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что изменение названия или описания не пересоздаёт '
+            'записи произведения в рейтингах.'
+        )
+        assert set(entries.values_list('id', 'board', 'key')) == before
+
+        response = admin_client.patch(
+            f'/api/v1/titles/{title_id}/', data={'year': 1990}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert set(entries.values_list('board', 'key')) == {
+            (LeaderboardEntry.GLOBAL, 0), (LeaderboardEntry.YEAR, 1990),
+            *(
+                (board, key) for _, board, key in before
+                if board in (LeaderboardEntry.CATEGORY,
+                             LeaderboardEntry.GENRE)
+            ),
+        }, (
+            'Проверьте, что при смене года произведение переходит в '
+            'рейтинг нового года.'
+        )
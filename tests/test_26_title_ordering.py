@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title
+from tests.benchmarks.dataset import seed_dataset
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26TitleOrdering:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def get_all_ids(self, client, query):
+        ids = []
+        url = f'{self.TITLES_URL}?{query}'
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+                'статусом 200.'
+            )
+            ids += [title['id'] for title in response.json()['results']]
+            url = response.json()['next']
+        return ids
+
+    def test_01_ordering(self, client):
+        seed_dataset(users=6, titles=17, reviews=30, comments=0)
+        Title.objects.filter(pk__in=Title.objects.values('pk')[:6]).update(
+            name='Одно название', year=2000, rating=7.0, rating_count=3
+        )
+        for query, ordering in (('', ('name', 'id')),
+                                ('ordering=name', ('name', 'id')),
+                                ('ordering=-year', ('-year', '-id')),
+                                ('ordering=rating', ('rating', 'id')),
+                                ('ordering=-rating', ('-rating', '-id')),
+                                ('ordering=-rating_count',
+                                 ('-rating_count', '-id')),
+                                ('ordering=-rating,name', ('-rating', 'name',
+                                                           'id')),
+                                ('ordering=description', ('name', 'id'))):
+            ids = self.get_all_ids(client, query)
+            expected = list(
+                Title.objects.order_by(*ordering).values_list('pk', flat=True)
+            )
+            assert ids == expected, (
+                f'Проверьте, что `{self.TITLES_URL}?{query}` сортирует '
+                f'произведения по {ordering}, а при равных значениях - по '
+                'id, и страницы не пересекаются.'
+            )
+
+    def test_02_index_backed(self, client):
+        seed_dataset(users=4, titles=8, reviews=10, comments=0)
+        for field in ('name', 'year', 'rating', 'rating_count'):
+            for ordering in (field, f'-{field}'):
+                url = f'{self.TITLES_URL}?ordering={ordering}'
+                with CaptureQueriesContext(connection) as context:
+                    response = client.get(url)
+                assert response.status_code == HTTPStatus.OK
+                sql = next(
+                    query['sql'] for query in context.captured_queries
+                    if 'FROM "reviews_title"' in query['sql']
+                    and 'ORDER BY' in query['sql']
+                )
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                    plan = ' '.join(row[-1] for row in cursor.fetchall())
+                assert 'TEMP B-TREE' not in plan, (
+                    f'Проверьте, что сортировку `{url}` обслуживает индекс, '
+                    f'а не сортировка всей таблицы: {plan}'
+                )
@@ -1,5 +1,11 @@
 from http import HTTPStatus
 
+from django.conf import settings
+
+from api_yamdb.constants import SHARED_CACHE
+
+TRANSACTION_STATEMENTS = ('BEGIN', 'SAVEPOINT', 'RELEASE', 'COMMIT')
+
 
 check_name_and_slug_patterns = (
     (
@@ -305,3 +311,18 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def app_queries(context):
+    """Запросы к таблицам из CaptureQueriesContext, без обращений к общему
+    кешу и команд управления транзакциями.
+
+    В тестах общий кеш - DatabaseCache, и его запросы к БД не относятся к
+    проверяемому коду.
+    """
+    table = f'"{settings.CACHES[SHARED_CACHE]["LOCATION"]}"'
+    return [
+        query for query in context.captured_queries
+        if table not in query['sql']
+        and not query['sql'].startswith(TRANSACTION_STATEMENTS)
+    ]